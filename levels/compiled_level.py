@@ -0,0 +1,97 @@
+# Compiled level format: the level after validation, stored as one bitmap of cells per color.
+#
+# header: magic, format version, width, height, source modification time (ns) and size, number of colors
+# then, for each color: the color code (index in colorList) and a bitmap with one bit per cell
+# (bit i of the little-endian bitmap is the cell i = row * width + col)
+#
+# The source time and size work like the ones in .pyc files: a compiled level is only used while its
+# JSON source (if there is one) hasn't changed. A compiled level is trusted, nothing is checked when it is loaded.
+
+import struct
+from os import stat
+
+from objects.colors import color_to_code
+from simulation.backends import board_class as default_board_class
+from simulation.board import Board
+
+COMPILED_LEVEL_SUFFIX = ".bin"
+
+_MAGIC = b"PBLV"
+_FORMAT_VERSION = 1
+_HEADER = struct.Struct("<4sBHHQQB")
+_COLOR = struct.Struct("<B")
+
+
+def compile_board(board: Board, source_file: str = None) -> bytes:
+    source_mtime, source_size = _source_stamp(source_file) if source_file is not None else (0, 0)
+
+    bitmaps: dict[int, int] = {}
+    for cell, color in board.occupied():
+        code = color_to_code[color]
+        bitmaps[code] = bitmaps.get(code, 0) | (1 << cell)
+
+    bitmap_size = _bitmap_size(board.width, board.height)
+    data = [_HEADER.pack(_MAGIC, _FORMAT_VERSION, board.width, board.height, source_mtime, source_size, len(bitmaps))]
+    for code, bitmap in sorted(bitmaps.items()):
+        data.append(_COLOR.pack(code))
+        data.append(bitmap.to_bytes(bitmap_size, "little"))
+    return b"".join(data)
+
+
+def decode_board(
+    data: bytes,
+    real_width: float = None, real_height: float = None, top_left: tuple[float, float] = (0, 0),
+    board_class: type[Board] = None
+) -> Board:
+    _, _, width, height, _, _, color_count = _read_header(data)
+
+    # the board implementation of the settings, unless another one is given
+    board_class = board_class if board_class is not None else default_board_class()
+    board = board_class(width, height, real_width, real_height, top_left)
+    bitmap_size = _bitmap_size(width, height)
+    offset = _HEADER.size
+    for _ in range(color_count):
+        (code,) = _COLOR.unpack_from(data, offset)
+        offset += _COLOR.size
+        bitmap = int.from_bytes(data[offset:offset + bitmap_size], "little")
+        offset += bitmap_size
+        board.load_cells((cell, code) for cell in _set_bits(bitmap))
+
+    return board
+
+
+def is_up_to_date(data: bytes, source_file: str) -> bool:
+    # true if the level was compiled from the current version of the source (or without a source)
+    _, _, _, _, source_mtime, source_size, _ = _read_header(data)
+    if source_mtime == 0 and source_size == 0:
+        return True
+
+    try:
+        return _source_stamp(source_file) == (source_mtime, source_size)
+    except OSError:
+        # only the compiled level was shipped
+        return True
+
+
+def _read_header(data: bytes) -> tuple:
+    if len(data) < _HEADER.size:
+        raise ValueError("Compiled level is too short")
+
+    header = _HEADER.unpack_from(data)
+    magic, version = header[0], header[1]
+    if magic != _MAGIC or version != _FORMAT_VERSION:
+        raise ValueError("Not a compiled level (or compiled with another format version)")
+    return header
+
+def _source_stamp(source_file: str) -> tuple[int, int]:
+    source_stat = stat(source_file)
+    return source_stat.st_mtime_ns, source_stat.st_size
+
+def _bitmap_size(width: int, height: int) -> int:
+    return (width * height + 7) // 8
+
+def _set_bits(bitmap: int):
+    while bitmap:
+        lowest = bitmap & -bitmap
+        yield lowest.bit_length() - 1
+        bitmap ^= lowest
@@ -1,26 +1,39 @@
 from objects.arena.hex_grid import HexGrid
 from objects.arena.hexcoord import HexCoord
-from objects.bubble import Bubble
 from objects.colors import BubbleColor
-from physics.kinematicPhysics import KinematicPhysics
+from simulation.backends import board_class as default_board_class
+from simulation.board import Board
+from levels.compiled_level import COMPILED_LEVEL_SUFFIX, decode_board, is_up_to_date
+from levels.level_pack import LevelPack
 
-from pygame import Vector2
 from os import path, listdir
 from copy import deepcopy
+from concurrent.futures import Future, ThreadPoolExecutor
 import json
 
 class LevelLoader:
-    AVAILABLE_LEVELS = []
+    # level file names of each directory that was already listed (directory -> names)
+    AVAILABLE_LEVELS: dict[str, list[str]] = {}
+    # level packs that were already opened (file -> pack), one mapping per file for every loader
+    LEVEL_PACKS: dict[str, LevelPack] = {}
+    # single worker shared by every loader, created on the first prefetch
+    _prefetch_executor: ThreadPoolExecutor | None = None
 
     def __init__(
         self,
         real_width: float = None, real_height: float = None, top_left: tuple[float, float] = (0, 0),
-        initial_level_index: int = 0
+        initial_level_index: int = 0,
+        level_path: str = None
     ) -> None:
+        # the levels come from a directory of level files (this package by default) or from a level pack file
         self.LEVEL_FILE_PREFIX = "lvl_"
         self.LEVEL_FILE_SUFFIX = ".json"
-        self.level_directory = path.dirname(path.abspath(__file__))
-        
+        level_path = level_path if level_path is not None else path.dirname(path.abspath(__file__))
+        if not path.exists(level_path):
+            raise RuntimeError(f"Level path not found: {level_path}")
+        self.level_directory = level_path if path.isdir(level_path) else None
+        self.level_pack = LevelLoader.open_level_pack(level_path) if self.level_directory is None else None
+
         self.grid_properties = (real_width, real_height, top_left)
         self._get_available_levels()
 
@@ -28,6 +41,9 @@ class LevelLoader:
         max_index = len(self.levels) - 1
         self.current_level_index = max(min_index, min(initial_level_index, max_index))
 
+        # (level index, board being loaded) of the last prefetch
+        self._prefetched: tuple[int, Future] | None = None
+
 
     def previous_level(self) -> None:
         self.current_level_index -= 1
@@ -43,19 +59,70 @@ class LevelLoader:
         if not self.is_valid():
             return None
 
-        level_file_name = self.levels[self.current_level_index]
-        level_file = path.join(self.level_directory, level_file_name)
+        board = None
+        if self._prefetched is not None:
+            index, future = self._prefetched
+            self._prefetched = None
+            if index == self.current_level_index:
+                # usually already done, otherwise waits for the worker instead of loading it twice
+                board = future.result()
+        if board is None:
+            board = self._load_board_at(self.current_level_index)
+
+        # the sprites are only created here, in the game thread (the board is used as it is)
+        if board is None:
+            return None
+        return HexGrid.from_board(board)
+
+    def prefetch_next_level(self) -> None:
+        # reads and decodes the next level (its board, without sprites) in a worker thread while the current one is played
+        next_index = self.current_level_index + 1
+        if next_index < 0 or next_index >= len(self.levels):
+            return
+
+        if LevelLoader._prefetch_executor is None:
+            LevelLoader._prefetch_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="level-prefetch")
+        self._prefetched = (next_index, LevelLoader._prefetch_executor.submit(self._load_board_at, next_index))
 
+    def _load_board_at(self, index: int) -> Board | None:
         grid_properties = self.get_grid_properties()
-        return LevelLoader.load_level(level_file, *grid_properties)
+        if self.level_pack is not None:
+            return LevelLoader.load_pack_board(self.level_pack, index, *grid_properties)
+
+        level_file = path.join(self.level_directory, self.levels[index])
+        return LevelLoader.load_board(level_file, *grid_properties)
+
+    @staticmethod
+    def open_level_pack(pack_file: str) -> LevelPack:
+        # the pack of the file, opened the first time (a new game doesn't map it again)
+        pack_file = path.abspath(pack_file)
+        if pack_file not in LevelLoader.LEVEL_PACKS:
+            try:
+                LevelLoader.LEVEL_PACKS[pack_file] = LevelPack(pack_file)
+            except (OSError, ValueError) as e:
+                raise RuntimeError(f"Invalid level pack: {e}")
+        return LevelLoader.LEVEL_PACKS[pack_file]
+
+    @staticmethod
+    def close_level_packs() -> None:
+        for pack in LevelLoader.LEVEL_PACKS.values():
+            pack.close()
+        LevelLoader.LEVEL_PACKS.clear()
 
     def get_grid_properties(self) -> tuple[float, float, tuple[float, float]]:
         return deepcopy(self.grid_properties)
 
 
     def _get_available_levels(self) -> None:
-        if LevelLoader.AVAILABLE_LEVELS:
-            self.levels = LevelLoader.AVAILABLE_LEVELS
+        if self.level_pack is not None:
+            # names are created when they are needed, opening a pack doesn't depend on its size
+            self.levels = self.level_pack
+            if not self.levels:
+                raise RuntimeError(f"No levels found in level pack: {self.level_pack.pack_file}")
+            return
+
+        if self.level_directory in LevelLoader.AVAILABLE_LEVELS:
+            self.levels = LevelLoader.AVAILABLE_LEVELS[self.level_directory]
             return
 
         size_prefix = len(self.LEVEL_FILE_PREFIX)
@@ -74,7 +141,7 @@ class LevelLoader:
         if not self.levels:
             raise RuntimeError(f"No levels found in directory: {self.level_directory}")
 
-        LevelLoader.AVAILABLE_LEVELS = self.levels
+        LevelLoader.AVAILABLE_LEVELS[self.level_directory] = self.levels
 
 
     @staticmethod
@@ -82,20 +149,82 @@ class LevelLoader:
         level_file: str,
         real_width: float = None, real_height: float = None, top_left: tuple[float, float] = (0, 0)
     ) -> HexGrid | None:
+        board = LevelLoader.load_board(level_file, real_width, real_height, top_left)
+        if board is None:
+            return None
+        return HexGrid.from_board(board)
+
+    @staticmethod
+    def load_pack_level(
+        level_pack: LevelPack, index: int,
+        real_width: float = None, real_height: float = None, top_left: tuple[float, float] = (0, 0)
+    ) -> HexGrid | None:
+        board = LevelLoader.load_pack_board(level_pack, index, real_width, real_height, top_left)
+        if board is None:
+            return None
+        return HexGrid.from_board(board)
+
+    @staticmethod
+    def load_board(
+        level_file: str,
+        real_width: float = None, real_height: float = None, top_left: tuple[float, float] = (0, 0)
+    ) -> Board | None:
+        # level without sprites, for the headless simulation and for the grids (with the board implementation
+        # of the settings)
+        # (from the compiled level when there is an up to date one)
+        board = LevelLoader.load_compiled_board(level_file, real_width, real_height, top_left)
+        if board is not None:
+            return board
+        return LevelLoader.load_json_board(level_file, real_width, real_height, top_left)
+
+    @staticmethod
+    def load_pack_board(
+        level_pack: LevelPack, index: int,
+        real_width: float = None, real_height: float = None, top_left: tuple[float, float] = (0, 0)
+    ) -> Board | None:
+        # the levels of a pack are already compiled
+        try:
+            return decode_board(level_pack.payload(index), real_width, real_height, top_left)
+        except (IndexError, ValueError) as e:
+            print(f"Invalid level {index + 1} in level pack: {e}")
+            return None
+
+    @staticmethod
+    def load_compiled_board(
+        level_file: str,
+        real_width: float = None, real_height: float = None, top_left: tuple[float, float] = (0, 0)
+    ) -> Board | None:
+        compiled_file = path.splitext(level_file)[0] + COMPILED_LEVEL_SUFFIX
+        try:
+            with open(compiled_file, 'rb') as f:
+                data = f.read()
+
+            if not is_up_to_date(data, level_file):
+                return None
+            return decode_board(data, real_width, real_height, top_left)
+        except (OSError, ValueError):
+            # not compiled (or not readable), the JSON level is used
+            return None
+
+    @staticmethod
+    def load_json_board(
+        level_file: str,
+        real_width: float = None, real_height: float = None, top_left: tuple[float, float] = (0, 0)
+    ) -> Board | None:
         try:
             level_json = LevelLoader.read_json(level_file)
             width, height, bubbles = LevelLoader.get_basic_level_data(level_json)
 
-            grid = HexGrid(width, height, real_width, real_height, top_left)
-            LevelLoader.add_level_bubbles(grid, bubbles)
+            board = default_board_class()(width, height, real_width, real_height, top_left)
+            LevelLoader.add_level_bubbles(board, bubbles)
 
-            return grid
+            return board
         except RuntimeError as e:
             print(e)
             return None
 
     @staticmethod
-    def add_level_bubbles(grid: HexGrid, bubbles: dict) -> None:
+    def add_level_bubbles(board: Board, bubbles: dict) -> None:
         for color, coords in bubbles.items():
             # Get the bubble color - skip if invalid
             bubble_color = LevelLoader.get_bubbles_color(color)
@@ -105,16 +234,7 @@ class LevelLoader:
             # Get the bubble coordinates and add them to the grid - skip if invalid
             bubble_coords = LevelLoader.get_bubbles_hex_coords(coords)
             for coord in bubble_coords:
-                if not grid.is_valid_coord(coord):
-                    print(f"Skipping bubble - Invalid position: {coord}")
-                    continue
-
-                phys = KinematicPhysics(grid.hex_to_pixel(coord),
-                                        Vector2(0,0),
-                                        Vector2(0,0))
-                bubble = Bubble(phys,bubble_color)
-                added = grid.add_bubble(bubble)
-                if not added:
+                if board.add(coord, bubble_color) is None:
                     print(f"Skipping bubble - Invalid position: {coord}")
 
 
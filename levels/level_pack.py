@@ -0,0 +1,113 @@
+# Level pack: many compiled levels (see compiled_level.py) in a single file.
+#
+# header: magic, format version, number of levels, offset of the index
+# payloads: the compiled levels, one after the other
+# index: one fixed-size (offset, size) entry per level, so any level is found without reading the others
+#
+# The pack is memory-mapped and read lazily: opening it only reads the header, no matter how many levels
+# it has. The index is at the end, so the writer can stream the levels without knowing how many there are.
+
+import mmap
+import struct
+from collections.abc import Sequence
+from os import path
+
+from levels.compiled_level import compile_board
+from simulation.board import Board
+
+LEVEL_PACK_SUFFIX = ".pack"
+
+_MAGIC = b"PBLP"
+_FORMAT_VERSION = 1
+_HEADER = struct.Struct("<4sBxxxIQ")
+_INDEX_ENTRY = struct.Struct("<QI")
+
+
+class LevelPack(Sequence):
+    # read-only view of a pack, as a sequence of level names ("<pack name>#<level number>")
+    def __init__(self, pack_file: str) -> None:
+        self.pack_file = pack_file
+        self._name = path.splitext(path.basename(pack_file))[0]
+
+        with open(pack_file, "rb") as f:
+            self._data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        try:
+            if len(self._data) < _HEADER.size:
+                raise ValueError(f"Level pack is too short: {pack_file}")
+
+            magic, version, self._count, self._index_offset = _HEADER.unpack_from(self._data)
+            if magic != _MAGIC or version != _FORMAT_VERSION:
+                raise ValueError(f"Not a level pack (or written with another format version): {pack_file}")
+            if self._index_offset + self._count * _INDEX_ENTRY.size > len(self._data):
+                raise ValueError(f"Level pack is truncated: {pack_file}")
+        except ValueError:
+            self._data.close()
+            raise
+
+    def __len__(self) -> int:
+        return self._count
+
+    def __getitem__(self, index: int) -> str:
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(self._count))]
+        return f"{self._name}#{self._check_index(index) + 1}"
+
+    def payload(self, index: int) -> bytes:
+        # compiled level of the given index
+        offset, size = _INDEX_ENTRY.unpack_from(self._data, self._index_offset + self._check_index(index) * _INDEX_ENTRY.size)
+        return self._data[offset:offset + size]
+
+    def close(self) -> None:
+        self._data.close()
+
+    def _check_index(self, index: int) -> int:
+        if index < 0:
+            index += self._count
+        if index < 0 or index >= self._count:
+            raise IndexError("Level index out of range")
+        return index
+
+    def __enter__(self) -> "LevelPack":
+        return self
+
+    def __exit__(self, *_) -> None:
+        self.close()
+
+
+class LevelPackWriter:
+    # writes the levels to the file as they are added, only the index is kept in memory
+    def __init__(self, pack_file: str) -> None:
+        self.pack_file = pack_file
+        self._file = open(pack_file, "wb")
+        self._index: list[tuple[int, int]] = []
+        # placeholder, written again when the pack is closed
+        self._file.write(_HEADER.pack(_MAGIC, _FORMAT_VERSION, 0, 0))
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+    def add(self, board: Board) -> None:
+        self.add_compiled(compile_board(board))
+
+    def add_compiled(self, data: bytes) -> None:
+        self._index.append((self._file.tell(), len(data)))
+        self._file.write(data)
+
+    def close(self) -> None:
+        if self._file.closed:
+            return
+
+        index_offset = self._file.tell()
+        for entry in self._index:
+            self._file.write(_INDEX_ENTRY.pack(*entry))
+
+        self._file.seek(0)
+        self._file.write(_HEADER.pack(_MAGIC, _FORMAT_VERSION, len(self._index), index_offset))
+        self._file.close()
+
+    def __enter__(self) -> "LevelPackWriter":
+        return self
+
+    def __exit__(self, *_) -> None:
+        self.close()
@@ -1,4 +1,10 @@
 from states.game.start_menu_state import StartMenuState
+from states.game.play_state import PlayState
+from levels.level_loader import LevelLoader
+from utils.fixed_timestep import FixedTimestep
+import utils.settings as settings
+import utils.profiler as profiler
+from utils.text_cache import text_cache
 
 import pygame
 import os
@@ -9,29 +15,78 @@ class Game:
         os.environ['SDL_VIDEO_CENTERED'] = '1'
         pygame.init()
         self._clock = pygame.time.Clock()
-        self._state = StartMenuState(args.level)
+        self._state = StartMenuState(args.level, args.level_pack, args.endless)
+        self._timestep = FixedTimestep(args.tick_rate, settings.MAX_FRAME_TIME)
+        self._record_file = args.record
+
+        self._profiler = None
+        self._profiler_overlay = None
+        if args.profile or args.profile_overlay or args.profile_export is not None:
+            self._profiler = profiler.enable(settings.PROFILER_WINDOW, args.profile_export)
+        if args.profile_overlay:
+            self._profiler_overlay = profiler.enable_overlay(
+                text_cache.font(settings.PROFILER_OVERLAY_FONT_NAME, settings.PROFILER_OVERLAY_FONT_SIZE),
+                settings.PROFILER_OVERLAY_COLOR, settings.PROFILER_OVERLAY_BG_COLOR,
+                settings.PROFILER_OVERLAY_REFRESH
+            )
 
     def run(self) -> bool:
         dt = 0
         while True:
             events = pygame.event.get()
             if not self._still_running(events):
+                self._record(self._state)
                 break
 
-            self._state.handle_input(events)
-            self._state.update(dt / 1000.0)
-            self._state.draw()
+            if self._profiler is not None:
+                self._run_profiled_frame(events, dt)
+            else:
+                self._run_frame(events, dt)
             
+            previous_state = self._state
             self._state = self._state.next_state()
-            dt = self._clock.tick(60)
+            if self._state is not previous_state:
+                self._record(previous_state)
+            dt = self._clock.tick(settings.FRAME_RATE)
         
         self._exit()
 
+    def _run_frame(self, events, dt: int) -> None:
+        self._state.handle_input(events)
+        # the game always moves in steps of the same duration, as many as the time of the last frame
+        for _ in range(self._timestep.advance(dt / 1000.0)):
+            self._state.update(self._timestep.step)
+        self._state.draw(self._timestep.alpha)
+
+    def _run_profiled_frame(self, events, dt: int) -> None:
+        # same as _run_frame, each phase timed (the overlay text isn't part of the frame)
+        if self._profiler_overlay is not None:
+            self._profiler_overlay.update()
+
+        t = self._profiler.now()
+        self._state.handle_input(events)
+        t = self._profiler.lap("handle_input", t)
+        for _ in range(self._timestep.advance(dt / 1000.0)):
+            self._state.update(self._timestep.step)
+        t = self._profiler.lap("update", t)
+        self._state.draw(self._timestep.alpha)
+        self._profiler.lap("draw", t)
+        self._profiler.end_frame()
+
     def _still_running(self, events) -> None:
         quit_event = any(event.type == pygame.QUIT for event in events)
         return self._state is not None and not quit_event
 
+    def _record(self, state) -> None:
+        # saves the game that just ended, to play it again with tools/play_replay.py
+        if self._record_file is not None and isinstance(state, PlayState):
+            state.replay().save(self._record_file)
+
     def _exit(self) -> None:
+        LevelLoader.close_level_packs()
+        if self._profiler is not None:
+            print("\n".join(self._profiler.report_lines()))
+            profiler.disable()
         pygame.quit()
 
 
@@ -44,7 +99,44 @@ class Game:
             type=int, default=1,
             help="Level number to load (starting from 1)"
         )
+        argparser.add_argument(
+            "-p", "--level-pack",
+            type=str, default=None,
+            help="Level pack file to play instead of the levels directory"
+        )
+        argparser.add_argument(
+            "-e", "--endless",
+            action="store_true",
+            help="Endless mode: new rows are pushed in at the top of the grid on every descent"
+        )
+        argparser.add_argument(
+            "-t", "--tick-rate",
+            type=float, default=settings.SIMULATION_TICK_RATE,
+            help="Game updates per second (independent of the frame rate)"
+        )
+        argparser.add_argument(
+            "--profile",
+            action="store_true",
+            help="Time each phase of the frame and print their percentiles (ms) on exit"
+        )
+        argparser.add_argument(
+            "--profile-overlay",
+            action="store_true",
+            help="Also show the phase percentiles on the screen (implies --profile)"
+        )
+        argparser.add_argument(
+            "--profile-export",
+            type=str, default=None,
+            help="File where the phase timings of every frame are written, .jsonl or CSV (implies --profile)"
+        )
+        argparser.add_argument(
+            "-r", "--record",
+            type=str, default=None,
+            help="File where the seed and the key events of the game are saved, to play it again"
+        )
         args = argparser.parse_args()
+        if args.level_pack is not None and not os.path.exists(args.level_pack):
+            argparser.error(f"level pack not found: {args.level_pack}")
 
         return args
 
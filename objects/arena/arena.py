@@ -1,13 +1,22 @@
 from typing import Any, List
 import pygame
 from objects.arena.hex_grid import HexGrid
+from objects.arena.hexcoord import HexCoord
+from objects.arena.events import BubblesAnimating, BubblesPopped, CascadeResult, GridEmptied, LevelLost, LevelWon
 from objects.wall import Wall
 from objects.bubble import Bubble
 from physics.staticPhysics import StaticPhysics
 from physics.kinematicPhysics import KinematicPhysics
+from physics.pathPhysics import PathPhysics
 from maps.map import Map
+from simulation.rules import BUBBLE_SPRITE_HALF_HEIGHT, Descent, pick_color
+from simulation.row_generators import RowGenerator
+from simulation.trajectory import TrajectorySolver
 
 import utils.settings as settings
+import utils.profiler as profiler
+from utils.pool import object_pools
+from utils.event_bus import EventBus
 
 import random
 
@@ -17,60 +26,111 @@ class Arena:
             self,
             shooter_position: pygame.Vector2,
             map: Map,
-            grid: HexGrid) -> None:
+            grid: HexGrid,
+            rng: random.Random = None,
+            row_generator: RowGenerator = None) -> None:
 
+        # random generator of the colors and of the falling bubbles (the random module by default)
+        self._rng = rng if rng is not None else random
         self._map = map
         self._shooter_position = shooter_position.copy()
         self._next_bubble_position = self._map.next_bubble_position
 
         self._grid = grid
-        self._grid.register_on_bubble_float_handler(self._handle_bubble_float)
-        self._grid.register_on_bubble_pop_handler(self._handle_bubble_pop)
-        self._grid.register_on_empty_handler(self._on_grid_empty)
+        self._grid.events.subscribe(CascadeResult,self._handle_cascade)
+        self._grid.events.subscribe(GridEmptied,self._on_grid_empty)
         self._walls: list[Wall] = self._map.arena_side_walls
 
         self._floor = self._map.arena_floor
 
         self._ceiling = self._map.arena_ceiling
 
+        self._trajectory = TrajectorySolver(self._grid.board,[wall.rect.x for wall in self._walls],self._ceiling.rect.y)
+        # shot bubbles -> (landing cell, grid version the trajectory was predicted with)
+        self._shots: dict[Bubble,tuple[HexCoord | None,int]] = {}
+
         self._dynamic_bubbles = pygame.sprite.Group()
 
+        self._ceiling_initial_y = self._ceiling.rect.y
+        # endless mode (with a row generator): the ceiling stays, the grid moves down and every descent
+        # pushes new rows in at the top of the grid (see _push_rows)
+        self._row_generator = row_generator
+        if self._row_generator is None:
+            self._descent = Descent(self._map.arena_down_cd,self._map.arena_down_move_amount,self._map.arena_down_transition_duration)
+        else:
+            push_height = settings.ENDLESS_PUSH_ROWS * self._grid.board.playable_scale[1]
+            self._descent = Descent(self._map.arena_down_cd,push_height,self._map.arena_down_transition_duration)
+            # descent offset and finished moves at the last push
+            self._pushed_offset = 0
+            self._pushed_moves = 0
+            # the grid was cleared, it's filled again once the shots in flight landed (see _refill_grid)
+            self._refill_pending = False
+            if self._grid.is_empty:
+                self._push_rows(settings.ENDLESS_START_ROWS)
+
         self._shooter_bubble = self.generate_random_bubble(self._shooter_position.copy(),self.get_random_color())
         self.spawn_bubble(self._shooter_bubble)
 
         self._next_bubble = self.generate_random_bubble(self._next_bubble_position,self.get_random_color())
         self.spawn_bubble(self._next_bubble)
 
-        self._moving = False
-        self._arena_down_current_time = self._map.arena_down_cd
-
-        self._lose_handlers = list()
-        self._win_handlers = list()
-        self._bubble_start_animation_handlers = list()
-        self._bubble_pop_handlers = list()
+        # BubblesAnimating when a cascade starts its animations, BubblesPopped when they are over,
+        # LevelWon and LevelLost at the end of the level
+        self.events = EventBus()
+        # bubbles whose animation ended during the update of the dynamic bubbles, published together
+        self._finished_bubbles: list[Bubble] = []
 
         self._grid_empty = False
+        # no more shots once the grid reached the floor (the last animations still play)
+        self._level_lost = False
 
     def spawn_bubble(self,bubble: Bubble):
         self._dynamic_bubbles.add(bubble)
 
     def generate_random_bubble(self,position,color):
-        phys = StaticPhysics(position)
-        return Bubble(phys,color=color)
+        # bubbles and physics bodies come from the pools (they go back when the bubble is gone)
+        phys = object_pools.acquire(StaticPhysics,position)
+        return object_pools.acquire(Bubble,phys,color=color)
 
     def get_random_color(self):
-        colors = [color for color in self._grid.get_present_colors()]
-        return random.choice(colors) if len(colors) > 0 else None
+        return pick_color(self._grid.get_present_colors(),self._rng)
 
 
     def update(self, *args: Any, **kwargs: Any) -> None:
+        if profiler.active is not None:
+            self._profiled_update(profiler.active, *args, **kwargs)
+            return
+
+        self._update_shot_trajectories()
         self._dynamic_bubbles.update(*args,**kwargs)
+        self._publish_finished_bubbles()
         self._bubbles_collide_with_walls()
-        self._bubbles_collide_with_grid()
+        self._land_shot_bubbles()
+        self._refill_grid()
         self._bubbles_collide_with_floor() 
 
         self._update_arena_down(dt=kwargs["dt"]) 
-        self._grid.update(*args,**kwargs)      
+        self._grid.update_between(*self.get_viewport(),*args,**kwargs)
+
+    def _profiled_update(self, frame_profiler: profiler.FrameProfiler, *args: Any, **kwargs: Any) -> None:
+        # same phases as update, each one timed
+        t = frame_profiler.now()
+        self._update_shot_trajectories()
+        self._dynamic_bubbles.update(*args,**kwargs)
+        self._publish_finished_bubbles()
+        t = frame_profiler.lap("arena.dynamic", t)
+        self._bubbles_collide_with_walls()
+        t = frame_profiler.lap("arena.walls", t)
+        self._land_shot_bubbles()
+        self._refill_grid()
+        t = frame_profiler.lap("arena.grid_collision", t)
+        self._bubbles_collide_with_floor()
+        t = frame_profiler.lap("arena.floor", t)
+
+        self._update_arena_down(dt=kwargs["dt"])
+        t = frame_profiler.lap("arena.arena_down", t)
+        self._grid.update_between(*self.get_viewport(),*args,**kwargs)
+        frame_profiler.lap("arena.grid_update", t)
 
     def get_floor(self):
         return self._floor
@@ -84,28 +144,67 @@ class Arena:
     def get_grid(self):
         return self._grid
 
+    def get_shooter_bubble(self) -> Bubble:
+        # the bubble the next shot fires
+        return self._shooter_bubble
+
+    def get_viewport(self) -> tuple[float, float]:
+        # the grid is only seen between the ceiling and the floor
+        return self._ceiling.rect.bottom,self._floor.rect.top
+
+    def get_visible_grid_bubbles(self):
+        return self._grid.bubbles_between(*self.get_viewport())
+
     def _bubbles_collide_with_walls(self):
         for bubble in self._dynamic_bubbles:
+            # shot bubbles bounce along their predicted trajectory
+            if bubble in self._shots:
+                continue
+
             for wall in self._walls:
                 if pygame.Vector2(bubble.position[0],0).distance_to(pygame.Vector2(wall.rect.x,0)) <= bubble.radius:
                     bubble.change_direction()
-                elif pygame.Vector2(0,bubble.position[1]).distance_to(pygame.Vector2(0,self._ceiling.rect.y)) <= bubble.radius:
-                    self._add_bubble_to_grid(bubble)
 
-    def _bubbles_collide_with_grid(self):
-        for bubble in self._dynamic_bubbles:
-            for grid_bubble in self._grid:
-                if bubble.shoted and pygame.sprite.collide_circle(bubble,grid_bubble):
-                    self._add_bubble_to_grid(bubble)
-
-    def _add_bubble_to_grid(self,bubble: Bubble):
+    def predict_landing(self,direction: pygame.Vector2,start: pygame.Vector2 = None) -> tuple[HexCoord | None,list[pygame.Vector2]]:
+        start = self._shooter_position if start is None else start
+        landing, path = self._trajectory.predict_landing((start.x,start.y),(direction.x,direction.y))
+        return landing, [pygame.Vector2(point) for point in path]
+
+    def _follow_trajectory(self,bubble: Bubble,direction: pygame.Vector2):
+        landing, path = self.predict_landing(direction,bubble.physics.position)
+
+        if isinstance(bubble.physics,PathPhysics):
+            bubble.physics.set_path(path)
+        else:
+            object_pools.release(bubble.physics)
+            bubble.physics = object_pools.acquire(PathPhysics,path,settings.BUBBLE_SHOT_SPEED * settings.GAME_SCALE)
+        self._shots[bubble] = (landing,self._grid.version)
+
+    def _update_shot_trajectories(self):
+        # a trajectory is only valid for the grid it was predicted with
+        for bubble, (_, version) in list(self._shots.items()):
+            if version != self._grid.version:
+                self._follow_trajectory(bubble,bubble.physics.direction)
+
+    def _land_shot_bubbles(self):
+        for bubble, (landing, _) in list(self._shots.items()):
+            if bubble.physics.finished:
+                del self._shots[bubble]
+                self._add_bubble_to_grid(bubble,landing)
+
+    def _add_bubble_to_grid(self,bubble: Bubble,hex_position: HexCoord = None):
         self._dynamic_bubbles.remove(bubble)
         bubble.stop()
 
-        hex_position = self._grid.add_bubble(bubble)
+        hex_position = self._grid.add_bubble(bubble,hex_position)
+        if hex_position is None:
+            # the landing cell was taken (or left the grid) since the trajectory was predicted:
+            # the bubble snaps to the closest free cell of its position instead
+            hex_position = self._grid.add_bubble(bubble)
 
-        if hex_position == None:
-            print("[ARENA] failed to add bubble")
+        if hex_position is None:
+            # no free cell left for it, the shot is lost
+            self._release_bubble(bubble)
             return None
 
         self._grid._pop_bubbles_from(hex_position)
@@ -115,35 +214,48 @@ class Arena:
             if bubble.floating and pygame.sprite.collide_rect(bubble,self._floor):
                     bubble.floor_hit()
         
-        grid_collided = pygame.sprite.groupcollide(self._grid,pygame.sprite.Group(self._floor),False,False)
-        if len(grid_collided) > 0:
-            for handler in self._lose_handlers:
-                handler()
+        if self._grid.board.reaches(self._floor.rect.top,BUBBLE_SPRITE_HALF_HEIGHT):
+            self._level_lost = True
+            self.events.publish(LevelLost())
 
 
     def _update_arena_down(self,dt):
-        self._arena_down_current_time -= dt
-
-        if self._arena_down_current_time <= 0:
-            self._initial_pos = self._ceiling.rect.topleft[1]
-            self._moving = True
-            self._current_move_time = 0
-            self._arena_down_current_time = self._map.arena_down_cd
-
-        if self._moving:
-            weight = self._current_move_time / self._map.arena_down_transition_duration
-            self._current_move_time += dt
-            pos = pygame.math.lerp(self._initial_pos,self._initial_pos + self._map.arena_down_move_amount,weight)
-            amount = pos - self._ceiling.rect.topleft[1]
-            self._ceiling.rect.topleft = (self._ceiling.rect.x,pos)
+        amount = self._descent.update(dt)
+
+        if amount != 0:
+            if self._row_generator is None:
+                self._ceiling.rect.topleft = (self._ceiling.rect.x,self._ceiling_initial_y + self._descent.offset)
             self._grid.move_grid_down(amount)
-            self._moving = self._current_move_time < self._map.arena_down_transition_duration
+
+        if self._row_generator is not None and self._descent.moves != self._pushed_moves:
+            self._pushed_moves = self._descent.moves
+            self._push_rows(settings.ENDLESS_PUSH_ROWS)
+
+    def _push_rows(self,rows: int):
+        # the grid goes back up the distance it moved down since the last push and its bubbles go the same
+        # rows down, so they don't move on the screen and the new rows fill the space left under the ceiling.
+        # The grid never grows: the bubbles pushed past its last row are dropped (the floor is reached first)
+        self._grid.move_grid_down(self._pushed_offset - self._descent.offset)
+        self._pushed_offset = self._descent.offset
+        for bubble in self._grid.shift_down(rows):
+            self._release_bubble(bubble)
+
+        # bottom row first, each row is made when it's pushed
+        for row in reversed(range(rows)):
+            cols = range(row % 2,self._grid.width,2)
+            colors = self._row_generator.next_row(len(cols),self._grid.board)
+            for col, color in zip(cols,colors):
+                if color is not None:
+                    coord = HexCoord(row,col)
+                    self._grid.add_bubble(self.generate_random_bubble(self._grid.hex_to_pixel(coord),color),coord)
     
     def shooter_shoot_handler(self,shoot_direction: pygame.Vector2):
-        if self._grid_empty:
+        # no shot at an empty grid, not even while endless mode waits to fill it (the colors come from the grid)
+        if self._grid_empty or self._level_lost or (self._row_generator is not None and self._refill_pending):
             return None
         
         self._shooter_bubble.shot(shoot_direction)
+        self._follow_trajectory(self._shooter_bubble,shoot_direction)
 
         self._shooter_bubble = self._next_bubble
         self._shooter_bubble.position = (self._shooter_position[0],self._shooter_position[1])
@@ -151,61 +263,65 @@ class Arena:
         self._next_bubble = self.generate_random_bubble(self._next_bubble_position,self.get_random_color())
         self.spawn_bubble(self._next_bubble)
 
+    def _handle_cascade(self,cascade: CascadeResult):
+        for bubble in cascade.popped_bubbles:
+            self._handle_bubble_pop(bubble)
+        for bubble in cascade.floating_bubbles:
+            self._handle_bubble_float(bubble)
+
+        self.events.publish(BubblesAnimating(cascade.popped_bubbles + cascade.floating_bubbles))
+
     def _handle_bubble_pop(self,bubble: Bubble):
         self.spawn_bubble(bubble)
         bubble.register_on_pop_animation_finished(self._handle_bubble_pop_finished)
-        self._handle_bubble_start_animation(bubble)
         bubble.play_pop_animation()
 
     def _handle_bubble_float(self,bubble: Bubble):
-        dir_x = random.randrange(settings.BUBBLE_FLOATING_DIRECTION_X_MINIMUM,settings.BUBBLE_FLOATING_DIRECTION_X_MAXIMUM) / 10
-        bubble.physics = KinematicPhysics(pygame.Vector2(*bubble.position),
-                                          pygame.Vector2(dir_x,1 - dir_x).normalize(),
-                                          pygame.Vector2(settings.BUBBLE_FLOATING_ACCELERATION_X,settings.BUBBLE_FLOATING_ACCELERATION_Y))
+        dir_x = self._rng.randrange(settings.BUBBLE_FLOATING_DIRECTION_X_MINIMUM,settings.BUBBLE_FLOATING_DIRECTION_X_MAXIMUM) / 10
+        object_pools.release(bubble.physics)
+        bubble.physics = object_pools.acquire(KinematicPhysics,pygame.Vector2(*bubble.position),
+                                                   pygame.Vector2(dir_x,1 - dir_x).normalize(),
+                                                   pygame.Vector2(settings.BUBBLE_FLOATING_ACCELERATION_X,settings.BUBBLE_FLOATING_ACCELERATION_Y))
         
-        bubble.set_floating(random.randrange(settings.BUBBLE_FLOATING_DURATION_MINIMUM,settings.BUBBLE_FLOATING_DURATION_MAXIMUM))
+        bubble.set_floating(self._rng.randrange(settings.BUBBLE_FLOATING_DURATION_MINIMUM,settings.BUBBLE_FLOATING_DURATION_MAXIMUM))
         bubble.register_on_pop_animation_finished(self._handle_bubble_pop_finished)
-        self._handle_bubble_start_animation(bubble)
         self.spawn_bubble(bubble)
 
-    def _handle_bubble_start_animation(self,bubble: Bubble):
-        for handler in self._bubble_start_animation_handlers:
-            handler(bubble)
-
     def _handle_bubble_pop_finished(self,bubble: Bubble):
-        for handler in self._bubble_pop_handlers:
-            handler(bubble)
-
-        bubble.unregister_on_pop_animation_finished(self._handle_bubble_pop_finished)
-        self._dynamic_bubbles.remove(bubble)
-        if self._grid_empty and len(self._dynamic_bubbles.sprites()) <= 2:
-            for handler in self._win_handlers:
-                handler()
-
-    def _on_grid_empty(self):
-        self._grid_empty = True
-
-    def register_bubble_start_animation_handler(self,handler):
-        self._bubble_start_animation_handlers.append(handler)
+        self._finished_bubbles.append(bubble)
 
-    def register_bubble_pop_handler(self,handler):
-        self._bubble_pop_handlers.append(handler)
-    
-    def register_win_handler(self,handler):
-        self._win_handlers.append(handler)
+    def _publish_finished_bubbles(self):
+        if not self._finished_bubbles:
+            return
 
-    def register_lose_handler(self,handler):
-        self._lose_handlers.append(handler)
+        bubbles = self._finished_bubbles
+        self._finished_bubbles = []
+        self.events.publish(BubblesPopped(bubbles))
 
+        for bubble in bubbles:
+            bubble.unregister_on_pop_animation_finished(self._handle_bubble_pop_finished)
+            self._dynamic_bubbles.remove(bubble)
+            self._release_bubble(bubble)
 
-    def unregister_bubble_start_animation_handler(self,handler):
-        self._bubble_start_animation_handlers = [h for h in self._bubble_start_animation_handlers if h != handler]
+        if self._grid_empty and len(self._dynamic_bubbles.sprites()) <= 2:
+            self.events.publish(LevelWon())
+
+    def _release_bubble(self,bubble: Bubble):
+        # the bubble isn't in any group anymore, it (and its physics body) can be reused
+        object_pools.release(bubble.physics)
+        object_pools.release(bubble)
+
+    def _on_grid_empty(self,_: GridEmptied):
+        # endless mode never runs out of bubbles
+        if self._row_generator is not None:
+            self._refill_pending = True
+            return
+        self._grid_empty = True
 
-    def unregister_bubble_pop_handler(self,handler):
-        self._bubble_pop_handlers = [h for h in self._bubble_pop_handlers if h != handler]
-    
-    def unregister_win_handler(self,handler):
-        self._win_handlers = [h for h in self._win_handlers if h != handler]
-    
-    def unregister_lose_handler(self,handler):
-        self._lose_handlers = [h for h in self._lose_handlers if h != handler]
+    def _refill_grid(self):
+        # new rows pushed right away would cover the shots still in flight, they wait until every shot landed
+        # (and may then push the landed ones down with the rest)
+        if self._row_generator is None or not self._refill_pending or self._shots:
+            return
+        self._refill_pending = False
+        self._push_rows(settings.ENDLESS_START_ROWS)
@@ -0,0 +1,56 @@
+from objects.bubble import Bubble
+from objects.colors import BubbleColor
+
+# events of the grid and of the arena (see utils/event_bus.py): each one carries every bubble it is about,
+# so a cascade of any size is a single call for each subscriber
+
+class CascadeResult:
+    # everything a shot removed from the grid: the matched group and the bubbles left floating,
+    # as (cell, color) of the board and as the bubbles (already out of the grid)
+    def __init__(
+        self,
+        popped_cells: list[tuple[int, BubbleColor]], floating_cells: list[tuple[int, BubbleColor]],
+        popped_bubbles: list[Bubble], floating_bubbles: list[Bubble]
+    ) -> None:
+        self.popped_cells = popped_cells
+        self.floating_cells = floating_cells
+        self.popped_bubbles = popped_bubbles
+        self.floating_bubbles = floating_bubbles
+
+    @property
+    def colors(self) -> dict[BubbleColor, int]:
+        # removed bubbles of each color
+        colors = {}
+        for _, color in self.popped_cells + self.floating_cells:
+            colors[color] = colors.get(color, 0) + 1
+        return colors
+
+    def __len__(self) -> int:
+        return len(self.popped_cells) + len(self.floating_cells)
+
+
+class GridEmptied:
+    # the last bubble of the grid was removed
+    pass
+
+
+class LevelWon:
+    # the grid is empty and its last bubbles are gone
+    pass
+
+
+class LevelLost:
+    # the grid reached the floor
+    pass
+
+
+class BubblesAnimating:
+    # the bubbles started their pop (or fall) animation
+    def __init__(self, bubbles: list[Bubble]) -> None:
+        self.bubbles = bubbles
+
+
+class BubblesPopped:
+    # the animation of the bubbles is over, they are gone
+    def __init__(self, bubbles: list[Bubble]) -> None:
+        self.bubbles = bubbles
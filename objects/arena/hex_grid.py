@@ -1,239 +1,271 @@
-from typing import Any
+from typing import Any, Iterable, Iterator
 from objects.arena.hexcoord import HexCoord
 from objects.colors import BubbleColor
 from objects.bubble import Bubble
-import pygame
+from physics.staticPhysics import StaticPhysics
+from simulation.board import Board
+from simulation.backends import board_class as default_board_class
+from objects.arena.events import CascadeResult, GridEmptied
+from utils.event_bus import EventBus
+from math import ceil, floor
 import utils.settings as settings
+import pygame
+
+class GridChunk:
+    # bubbles of a few consecutive rows of the grid: the bubble of each cell (from the first cell of the chunk)
+    # and the bubbles in the order they were added, to visit them without looking at the empty cells
+    def __init__(self, size: int) -> None:
+        self.cells: list[Bubble | None] = [None] * size
+        self.bubbles: dict[Bubble, None] = {}
 
 class HexGrid(pygame.sprite.Group):
+    # sprite view of a Board: the board owns the cells and the rules, the grid keeps the bubble of each cell
     def __init__(
         self,
         width: int, height: int,
         real_width: float = None, real_height: float = None,
-        top_left: tuple[float, float] = (0, 0)
+        top_left: tuple[float, float] = (0, 0),
+        board_class: type[Board] = None,
+        chunk_rows: int = None,
+        board: Board = None
     ) -> None:
         super().__init__()
-        self.width = width
-        self.height = height
-        if self.width < 1 or self.height < 1:
-            raise ValueError("Width and height must be at least 1")
-
-        self.real_width = real_width if real_width is not None else self.width
-        self.real_height = real_height if real_height is not None else self.height
-        if self.real_width <= 0 or self.real_height <= 0:
-            raise ValueError("Real width and height must be positive")
+        # a new board of the implementation of the settings (unless another one is given), or the given board
+        # (e.g. a loaded level, which already has the size, the position and the bubbles)
+        if board is None:
+            board_class = board_class if board_class is not None else default_board_class()
+            board = board_class(width, height, real_width, real_height, top_left)
+        self.board = board
+
+        # the bubbles are kept in chunks of chunk_rows rows, created with their first bubble and dropped with
+        # their last one, so a very tall grid only costs its bubbles, and drawing and updating the grid only
+        # visits the chunks in view (see bubbles_between)
+        self.chunk_rows = chunk_rows if chunk_rows is not None else settings.GRID_CHUNK_ROWS
+        self._chunk_size = self.board.width * self.chunk_rows
+        self._chunks: dict[int, GridChunk] = {}
+        # back-reference from each bubble to its cell (same indexes as the board)
+        self._bubble_to_cell: dict[Bubble,int] = {}
+
+        # the bubbles are placed in grid coordinates (where they are with the grid at its initial position), so
+        # moving the grid down only moves the board: the offset is applied when the grid is drawn (see draw_offset),
+        # and the collisions already use the board. A bubble gets its screen position back when it leaves the grid
+        self._origin = self.board.top_left
+        self._local_top_left = self.board.playable_top_left
+
+        # CascadeResult after every pop, GridEmptied when the last bubble is removed
+        self.events = EventBus()
+
+        # the bubbles of the given board only need their sprites
+        for cell, color in self.board.occupied():
+            bubble = Bubble(StaticPhysics(pygame.Vector2(self._local_center(cell))), color)
+            self._set_cell_bubble(cell, bubble)
+            self._bubble_to_cell[bubble] = cell
+        self.add(*self._bubble_to_cell)
+
+    @classmethod
+    def from_board(cls, board: Board, chunk_rows: int = None) -> "HexGrid":
+        # grid over an existing board
+        return cls(board.width, board.height, board.real_width, board.real_height, board.top_left, chunk_rows=chunk_rows, board=board)
+
+    @property
+    def width(self) -> int:
+        return self.board.width
+
+    @property
+    def height(self) -> int:
+        return self.board.height
+
+    @property
+    def top_left(self) -> tuple[float, float]:
+        return self.board.top_left
+
+    @property
+    def version(self) -> int:
+        return self.board.version
+
+    @property
+    def offset(self) -> tuple[float, float]:
+        # distance the grid moved from its initial position
+        return self.board.top_left[0] - self._origin[0], self.board.top_left[1] - self._origin[1]
+
+    @property
+    def draw_offset(self) -> tuple[int, int]:
+        # offset of the bubble sprites on the screen, in whole pixels
+        offset_x, offset_y = self.offset
+        return round(offset_x), round(offset_y)
+
+    def add_bubble(self, bubble: Bubble, hex_pos: HexCoord = None):
+        # without a coordinate, the bubble snaps to the closest empty cell of its position
+        if hex_pos is None:
+            hex_pos = self._pixel_to_hex(bubble.position)
+
+        cell = self.board.add(hex_pos, bubble.color)
+        if cell is None:
+            return None
 
-        self.top_left = top_left
-        self.scale = (self.real_width / self.width, self.real_height / self.height)
-        self._calculate_playable_area()
+        bubble.position = self._local_center(cell)
 
-        self.hex_to_bubble: dict[HexCoord,Bubble] = {}
+        self._set_cell_bubble(cell, bubble)
+        self._bubble_to_cell[bubble] = cell
 
-        self._on_bubble_pop_handlers = list()
-        self._on_bubble_float_handlers = list()
-        self._on_empty_handlers = list()
+        self.add(bubble)
+        return hex_pos
 
-    def add_bubble(self, bubble: Bubble):
-        hex_pos = self._pixel_to_hex(bubble.position)
-        if not self.is_valid_coord(hex_pos):
-            return None
+    def shift_down(self, rows: int) -> list[Bubble]:
+        # moves every bubble rows down (see Board.shift_down), the bubbles moved out of the grid are removed and returned
+        shift = rows * self.width
+        size = self.width * self.height
+        cells = list(self._bubble_to_cell.items())
+        for _, cell in cells:
+            self._clear_cell_bubble(cell)
+        self._bubble_to_cell.clear()
+
+        self.board.shift_down(rows)
+
+        removed = []
+        for bubble, cell in cells:
+            if cell + shift >= size:
+                self.remove(bubble)
+                removed.append(bubble)
+                continue
 
-        new_pos = self.hex_to_pixel(hex_pos)
-        bubble.position = (new_pos.x,new_pos.y)
-        self.hex_to_bubble[hex_pos] = bubble
+            self._set_cell_bubble(cell + shift, bubble)
+            self._bubble_to_cell[bubble] = cell + shift
+            bubble.position = self._local_center(cell + shift)
+        return removed
 
-        self.add(bubble)
-        return hex_pos
-    
     def move_grid_down(self,amount):
-        self.top_left = (self.top_left[0],self.top_left[1] + amount)
-        self._update_bubbles_pos(amount)
-        self._calculate_playable_area()
+        # the same for any number of bubbles, they are drawn with the new offset
+        self.board.move_down(amount)
 
-    def _calculate_playable_area(self) -> None:
-        self.playable_width = self.real_width - 20
-        self.playable_height = self.real_height - 10
-        self.playable_scale = (self.playable_width / self.width, self.playable_height / self.height)
+    def _get_bubble(self, hexcoord: HexCoord) -> Bubble | None:
+        if not self.board.in_bounds(hexcoord):
+            return None
+        return self._cell_bubble(self.board.cell_index(hexcoord))
 
-        scale_x, scale_y = self.playable_scale
-        top_left_x, top_left_y = self.top_left
-        top_left_x, top_left_y = (top_left_x + scale_x / 2, top_left_y + scale_y / 2)
-        self.playable_top_left = (top_left_x + 3 * settings.GAME_SCALE, top_left_y + 3 * settings.GAME_SCALE)
+    def get_bubble_coord(self, bubble: Bubble) -> HexCoord | None:
+        cell = self._bubble_to_cell.get(bubble,None)
+        return self.board.cell_coord(cell) if cell is not None else None
 
-    def _get_bubble(self, hexcoord: HexCoord) -> Bubble | None:
-        return self.hex_to_bubble.get(hexcoord,None)
+    def occupied(self) -> Iterator[tuple[HexCoord,Bubble]]:
+        for bubble,cell in self._bubble_to_cell.items():
+            yield self.board.cell_coord(cell),bubble
 
     def is_valid_coord(self, coord: HexCoord) -> bool:
-        if coord.row < 0 or coord.row >= self.height or coord.col < 0 or coord.col >= self.width:
-            return False
-        elif self._get_bubble(coord) is not None:
-            return False
-        return True
+        return self.board.is_valid_coord(coord)
 
     def _get_connected_bubbles(self, hexcoord: HexCoord, color: BubbleColor = None) -> list[Bubble]:
-        coords_to_check = [hexcoord]
-        connected_bubbles = []
-        coords_checked = []
-
-        while coords_to_check:
-            coord = coords_to_check.pop(0)
-            coords_checked.append(coord)
-
-            bubble = self._get_bubble(coord)
-            if bubble is None or (color is not None and bubble.color != color):
-                continue
-
-            connected_bubbles.append(bubble)
-            coords_to_check.extend([
-                neighbor for neighbor in coord.neighbors()
-                if neighbor not in coords_to_check and neighbor not in coords_checked
-            ])
-
-        return connected_bubbles
+        return [self._cell_bubble(cell) for cell in self.board.connected_cells(hexcoord, color)]
 
 
     def _pop_bubbles_from(self, hexcoord: HexCoord) -> bool:
-        bubble = self._get_bubble(hexcoord)
-        if bubble is None:
-            return False
-        
-        adjacent_bubbles = self._get_connected_bubbles(hexcoord, bubble.color)
-        if len(adjacent_bubbles) < 3:
+        result = self.board.pop_from(hexcoord)
+        if result is None:
             return False
-        
-        for bubble in adjacent_bubbles:
-            if len(self._on_bubble_pop_handlers) > 0:
-                for callback in self._on_bubble_pop_handlers:
-                    callback(bubble)
 
-            self._remove_bubble(bubble)
+        popped, floating = result
+        popped_bubbles = [self._remove_sprite(cell) for cell, _ in popped]
+        floating_bubbles = [self._remove_sprite(cell) for cell, _ in floating]
+        # the whole cascade at once, with the grid already without its bubbles
+        self.events.publish(CascadeResult(popped, floating, popped_bubbles, floating_bubbles))
 
-        self._pop_floating_bubbles()
         self._check_empty()
-        
+
         return True
-    
+
 
     def _remove_bubble(self,bubble: Bubble):
-        h = None
-        for hex,b in self.hex_to_bubble.items():
-            if bubble == b:
-                h = hex
-                break
-
-        if h != None:
-            del self.hex_to_bubble[hex]
-            self.remove(bubble)
-
-    def _get_floating_bubbles(self): 
-        first_row = 0
-        non_floating_bubbles = set()
-        for hex,bubble in self.hex_to_bubble.items():
-            if hex.row != first_row:
-                continue
-            
-            if bubble not in non_floating_bubbles:
-                non_floating_bubbles.add(bubble)
-
-            neigh = self._get_connected_bubbles(hex)
-            if neigh:
-                non_floating_bubbles.update(neigh)
-
-        return [bubble for bubble in self.sprites() if bubble not in non_floating_bubbles]
-
-    def _pop_floating_bubbles(self) -> None:
-        floating_bubbles = self._get_floating_bubbles()
-
-        for bubble in floating_bubbles:
-            if len(self._on_bubble_float_handlers) > 0:
-                for callback in self._on_bubble_float_handlers:
-                    callback(bubble)
-                    
-            self._remove_bubble(bubble)
-    
+        cell = self._bubble_to_cell.get(bubble,None)
+
+        if cell is not None:
+            self.board.remove(cell)
+            self._remove_sprite(cell)
+
+    def _remove_sprite(self, cell: int) -> Bubble:
+        bubble = self._clear_cell_bubble(cell)
+        del self._bubble_to_cell[bubble]
+        self.remove(bubble)
+        # back to screen coordinates (e.g. to pop or fall from where it was seen)
+        bubble.position = self.board.cell_center(cell)
+        return bubble
+
+    def _get_floating_bubbles(self, removed_cells: Iterable[int] = None) -> list[Bubble]:
+        return [self._cell_bubble(cell) for cell in self.board.floating_cells(removed_cells)]
+
     def _check_empty(self) -> None:
-        if self.sprites():
+        if not self.is_empty:
             return
-        
-        if len(self._on_empty_handlers) > 0:
-            for callback in self._on_empty_handlers:
-                callback()
-
 
-    def get_present_colors(self) -> set[BubbleColor]:
-        return set(bubble.color for bubble in self.sprites())
-    
+        self.events.publish(GridEmptied())
 
-    def _pixel_to_hex(self, position: tuple[float, float]) -> HexCoord:
-        x, y = position
-        scale_x, scale_y = self.playable_scale
-        top_left_x, top_left_y = self.playable_top_left
-
-        # pixel -> arena
-        pixel_arena_x, pixel_arena_y = x - top_left_x, y - top_left_y
-        arena_col = pixel_arena_x / scale_x
-        arena_row = pixel_arena_y / scale_y
-
-        # arena -> hex (rounded)
-        rounded_row = round(arena_row)
-        rounded_col = round(arena_col)
-        row_multiplier, col_multiplier = 2, 1
-        diff_fn = lambda c: row_multiplier * abs(c.row - arena_row) + col_multiplier * abs(c.col - arena_col)
-        
-        # non hex -> hex (closest between left and right)
-        if not HexCoord.is_valid(rounded_row, rounded_col):
-            left_coord = HexCoord(rounded_row, rounded_col - 1)
-            right_coord = HexCoord(rounded_row, rounded_col + 1)
-            rounded_col = min([left_coord, right_coord], key=diff_fn).col
-
-        # possible hex coord + neighbors
-        coord = HexCoord(rounded_row, rounded_col)
-        neighbors = coord.neighbors()
-        neighbors.sort(key=diff_fn)
-
-        # find the first valid neighbor (or the original coord)
-        while not self.is_valid_coord(coord) and neighbors:
-            coord = neighbors.pop(0)
-
-        # not found?
-        if not self.is_valid_coord(coord):
-            print("PANIC! No valid hex coord found")
-
-        return coord
-    
-    def hex_to_pixel(self,hex_coord: HexCoord):
-        scale_x, scale_y = self.playable_scale
-        top_left_x, top_left_y = self.playable_top_left
 
-        pixel_arena_x = hex_coord.col * scale_x
-        pixel_arena_y = hex_coord.row * scale_y
+    # the board keeps a count of the bubbles of each color, these don't look at the bubbles
+    def get_present_colors(self) -> frozenset[BubbleColor]:
+        return self.board.present_colors()
 
-        x = pixel_arena_x + top_left_x
-        y = pixel_arena_y + top_left_y
+    def get_color_histogram(self) -> dict[BubbleColor, int]:
+        return self.board.color_counts()
 
-        return pygame.Vector2(x,y)
+    @property
+    def is_empty(self) -> bool:
+        return self.board.is_empty
 
-    
-    def _update_bubbles_pos(self,move_amount):
-        for bubble in self.sprites():
-            x,y = bubble.position
-            bubble.position = (x,y + move_amount)
+    @property
+    def bubble_count(self) -> int:
+        return len(self.board)
 
 
-    def register_on_bubble_pop_handler(self,handler):
-        self._on_bubble_pop_handlers.append(handler)
+    def _pixel_to_hex(self, position: tuple[float, float]) -> HexCoord:
+        return self.board.pixel_to_hex(position)
 
-    def register_on_bubble_float_handler(self,handler):
-        self._on_bubble_float_handlers.append(handler)
-    
-    def register_on_empty_handler(self,handler):
-        self._on_empty_handlers.append(handler)
+    def hex_to_pixel(self,hex_coord: HexCoord):
+        return pygame.Vector2(*self.board.hex_to_pixel(hex_coord))
+
+    def _local_center(self, cell: int) -> tuple[float, float]:
+        # same as Board.cell_center, with the grid at its initial position
+        row, col = divmod(cell, self.width)
+        scale_x, scale_y = self.board.playable_scale
+        top_left_x, top_left_y = self._local_top_left
+        return col * scale_x + top_left_x, row * scale_y + top_left_y
+
+
+    def _cell_bubble(self, cell: int) -> Bubble | None:
+        chunk = self._chunks.get(cell // self._chunk_size, None)
+        return chunk.cells[cell % self._chunk_size] if chunk is not None else None
+
+    def _set_cell_bubble(self, cell: int, bubble: Bubble) -> None:
+        index = cell // self._chunk_size
+        chunk = self._chunks.get(index, None)
+        if chunk is None:
+            chunk = self._chunks[index] = GridChunk(self._chunk_size)
+        chunk.cells[cell % self._chunk_size] = bubble
+        chunk.bubbles[bubble] = None
+
+    def _clear_cell_bubble(self, cell: int) -> Bubble:
+        index = cell // self._chunk_size
+        chunk = self._chunks[index]
+        bubble = chunk.cells[cell % self._chunk_size]
+        chunk.cells[cell % self._chunk_size] = None
+        del chunk.bubbles[bubble]
+        if not chunk.bubbles:
+            del self._chunks[index]
+        return bubble
+
+    def visible_chunks(self, top: float, bottom: float) -> range:
+        # chunks with rows between the two y (in pixels), with a row of margin for the bubbles across them
+        first_row = floor(self.board.pixel_to_arena((0, top))[0]) - 1
+        last_row = ceil(self.board.pixel_to_arena((0, bottom))[0]) + 1
+        first_row, last_row = max(0, first_row), min(self.height - 1, last_row)
+        return range(first_row // self.chunk_rows, last_row // self.chunk_rows + 1)
+
+    def bubbles_between(self, top: float, bottom: float) -> Iterator[Bubble]:
+        for index in self.visible_chunks(top, bottom):
+            chunk = self._chunks.get(index, None)
+            if chunk is not None:
+                yield from chunk.bubbles
+
+    def update_between(self, top: float, bottom: float, *args: Any, **kwargs: Any) -> None:
+        # like update, only for the bubbles in view (the others don't change)
+        for bubble in list(self.bubbles_between(top, bottom)):
+            bubble.update(*args, **kwargs)
 
-    def unregister_on_bubble_pop_handler(self,handler):
-        self._on_bubble_pop_handlers = [h for h in self._on_bubble_pop_handlers if h != handler]
-    
-    def unregister_on_bubble_float_handler(self,handler):
-        self._on_bubble_float_handlers = [h for h in self._on_bubble_float_handlers if h != handler]
-    
-    def unregister_on_empty_handler(self,handler):
-        self._on_empty_handlers = [h for h in self._on_empty_handlers if h != handler]
@@ -1,3 +1,4 @@
+import threading
 from enum import Enum
 
 class HexDirection(Enum):
@@ -8,31 +9,67 @@ class HexDirection(Enum):
     SOUTHWEST = (1, -1)
     WEST = (0, -2)
 
+# (row, col) offsets of every direction, in the order they are declared
+DIRECTION_OFFSETS: tuple[tuple[int, int], ...] = tuple(direction.value for direction in HexDirection)
+
 class HexCoord:
-    def __init__(self, row: int, col: int) -> None:
+    # coordinates are immutable, and interned inside the first INTERN_ROWS x INTERN_COLS cells (every cell of the
+    # levels): there is a single instance for each (row, col) there. Coordinates outside (big generated grids,
+    # neighbors out of the board) are plain instances, so the table never grows past that size
+    __slots__ = ("row", "col", "_hash", "_neighbors")
+    INTERN_ROWS = 64
+    INTERN_COLS = 64
+    _instances: dict[tuple[int, int], "HexCoord"] = {}
+    # the levels may be loaded in another thread (see LevelLoader.prefetch_next_level)
+    _instances_lock = threading.Lock()
+
+    def __new__(cls, row: int, col: int) -> "HexCoord":
+        coord = cls._instances.get((row, col), None)
+        if coord is not None:
+            return coord
+
         if not HexCoord.is_valid(row, col):
             raise ValueError(f"Invalid hex coordinates: ({row}, {col})")
 
-        self.row = row
-        self.col = col
+        coord = super().__new__(cls)
+        object.__setattr__(coord, "row", row)
+        object.__setattr__(coord, "col", col)
+        object.__setattr__(coord, "_hash", hash((row, col)))
+        object.__setattr__(coord, "_neighbors", None)
+        if not (0 <= row < HexCoord.INTERN_ROWS and 0 <= col < HexCoord.INTERN_COLS):
+            return coord
+
+        with cls._instances_lock:
+            # another thread may have interned it first
+            return cls._instances.setdefault((row, col), coord)
+
+    def __setattr__(self, name: str, value) -> None:
+        raise AttributeError("HexCoord is immutable")
+
+    def __delattr__(self, name: str) -> None:
+        raise AttributeError("HexCoord is immutable")
+
+    def __reduce__(self):
+        return (HexCoord, (self.row, self.col))
 
     @staticmethod
     def is_valid(row: int, col: int) -> bool:
         return (row + col) % 2 == 0
-    
+
     def neighbors(self) -> list["HexCoord"]:
-        directions = HexDirection.__members__.values()
-        return [HexCoord(self.row + dir.value[0], self.col + dir.value[1]) for dir in directions]
-    
+        if self._neighbors is None:
+            object.__setattr__(self, "_neighbors", tuple(HexCoord(self.row + d_row, self.col + d_col) for d_row, d_col in DIRECTION_OFFSETS))
+        return list(self._neighbors)
+
 
     def __eq__(self, other) -> bool:
-        return isinstance(other, HexCoord) and self.row == other.row and self.col == other.col
-    
+        return self is other or (isinstance(other, HexCoord) and self.row == other.row and self.col == other.col)
+
     def __hash__(self) -> int:
-        return hash((self.row, self.col))
-    
+        return self._hash
+
     def __str__(self) -> str:
         return f"({self.row}, {self.col})"
-    
+
     def __repr__(self) -> str:
         return str(self)
@@ -12,30 +12,46 @@ class Bubble(pygame.sprite.Sprite):
     ) -> None:
         super().__init__()
 
+        self.radius = settings.BUBBLE_RADIUS
+        self._on_pop_animation_finish_handlers = list()
+        # the states with data of their own are created once per bubble, and reset when they are used again
+        self._floating_state: Floating | None = None
+        self._pop_state: Pop | None = None
+
+        self.rect = bubble_sprites[color][0].get_rect()
+        self.reset(physics,color)
+
+    def reset(self,
+              physics: Physics,
+              color: BubbleColor = BubbleColor.BLUE
+    ) -> None:
+        # same arguments as the constructor, to reuse the bubble (see utils/pool.py)
         self.physics = physics
         self.color = color
 
-        self.radius = settings.BUBBLE_RADIUS
         self._sprites = bubble_sprites[color]
         self.set_image(self._sprites[0])
-        self.rect = self.image.get_rect()
+        self.rect.size = self.image.get_size()
 
         self.rect.center = self.physics.position
+        # position at the start of the last update, to draw the bubble between updates
+        self.previous_position = self.rect.center
 
-        self.state = Idle()
+        self.state = IDLE
 
-        self._on_pop_animation_finish_handlers = list()
+        self._on_pop_animation_finish_handlers.clear()
 
     def update(self, *args: Any, **kwargs: Any) -> None:
         dt = kwargs["dt"]
 
+        self.previous_position = self.rect.center
         self.state.update(self,dt)
 
     def change_direction(self):
         self.physics.change_horizontal_direction()
 
     def stop(self):
-        self.state = Idle()
+        self.state = IDLE
     
     @property
     def floating(self):
@@ -51,29 +67,42 @@ class Bubble(pygame.sprite.Sprite):
     
     @position.setter
     def position(self,new_pos):
+        # a jump, not a movement: nothing to interpolate
         self.rect.center = new_pos
+        self.previous_position = self.rect.center
         self.physics.position = pygame.Vector2(*new_pos)
 
+    def interpolated_position(self,alpha: float) -> tuple[int,int]:
+        # position between the previous update (alpha 0) and the last one (alpha 1)
+        (previous_x, previous_y), (x, y) = self.previous_position, self.rect.center
+        return (round(previous_x + (x - previous_x) * alpha),round(previous_y + (y - previous_y) * alpha))
+
     def set_floating(self,duration: float):
-        self.state = Floating(duration,self.play_pop_animation)
+        if self._floating_state is None:
+            self._floating_state = Floating(duration,self.play_pop_animation)
+        else:
+            self._floating_state.reset(duration,self.play_pop_animation)
+        self.state = self._floating_state
 
     def floor_hit(self):
         self.physics.speed.y = -self.physics.speed.y * 0.6
-        if abs(self.physics.speed.y) < 0.2:
+        if abs(self.physics.speed.y) < settings.BUBBLE_FLOOR_STOP_SPEED:
             self.physics.stop()
 
     def play_pop_animation(self):
-        FRAMES_PER_IMAGE = settings.BUBBLE_TOTAL_POP_ANIMATION_FRAMES // (len(self._sprites)-1)
-        self.state = Pop(self._sprites[1:],settings.BUBBLE_TOTAL_POP_ANIMATION_FRAMES,
-                         FRAMES_PER_IMAGE,settings.GAME_SCALE,
-                         self._pop_finished)
+        if self._pop_state is None:
+            self._pop_state = Pop(self._sprites[1:],settings.BUBBLE_POP_ANIMATION_DURATION,self._pop_finished)
+        else:
+            self._pop_state.reset(self._sprites[1:],settings.BUBBLE_POP_ANIMATION_DURATION,self._pop_finished)
+        self.state = self._pop_state
 
     def shot(self,direction):
         self.physics.direction = direction.copy()
-        self.state = Shot()
+        self.state = SHOT
 
     def set_image(self,image):
-        self.image = pygame.transform.scale_by(image,settings.GAME_SCALE)
+        # images come from bubble_sprites, which are already scaled
+        self.image = image
 
     def _pop_finished(self):
         for handler in self._on_pop_animation_finish_handlers:
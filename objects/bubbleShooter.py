@@ -3,6 +3,7 @@ from inputs.inputHandler import InputHandler
 from inputs.bubbleshooter.shoot import Shoot
 from inputs.bubbleshooter.rotate import Rotate,Direction
 import utils.settings as settings
+from utils.assets import assets
 
 class Arrow(pygame.sprite.Sprite):
     def __init__(self,init_pos: pygame.Vector2,group,arrow_image_path) -> None:
@@ -19,8 +20,7 @@ class Arrow(pygame.sprite.Sprite):
         self.rect = self.image.get_rect(center=self._pos)
 
     def _create_image(self,image_path):
-        self._original_image = pygame.image.load(image_path).convert_alpha()
-        self._original_image = pygame.transform.scale_by(self._original_image,settings.GAME_SCALE)
+        self._original_image = assets.image(image_path,settings.GAME_SCALE)
         self.image = self._original_image
         self.rect = self.image.get_rect()
         self.rect.center = self._pos
@@ -38,6 +38,8 @@ class BubbleShooter(pygame.sprite.Group):
 
         self._on_shoot_callbacks = list()
         self._angle = 90
+        # rotation asked since the last update (-1 left, 1 right), applied with the duration of the update
+        self._rotation = 0
 
     @property
     def input_handler(self):
@@ -47,11 +49,15 @@ class BubbleShooter(pygame.sprite.Group):
     def position(self):
         return self.center
 
+    @property
+    def angle(self) -> float:
+        # degrees, 90 is straight up
+        return self._angle
+
     def _create_sprite_and_arrow(self,shooter_image_path,arrow_image_path):
         sprite = pygame.sprite.Sprite(self)
 
-        sprite.image = pygame.image.load(shooter_image_path).convert_alpha()
-        sprite.image = pygame.transform.scale_by(sprite.image,settings.GAME_SCALE)
+        sprite.image = assets.image(shooter_image_path,settings.GAME_SCALE)
 
         sprite.rect = sprite.image.get_rect()
         sprite.rect.center = self.center
@@ -70,16 +76,21 @@ class BubbleShooter(pygame.sprite.Group):
             callback(self._shootDir)
 
     def rotate(self,direction: Direction):
-        dir = -1 if direction == Direction.LEFT else 1
+        self._rotation += -1 if direction == Direction.LEFT else 1
 
-        angle = settings.BUBBLE_SHOOTER_ROTATION_DEGREES * dir
-        if self._angle + angle < settings.BUBBLE_SHOOTER_MINIMUM_ROTATION or self._angle + angle > settings.BUBBLE_SHOOTER_MAXIMUM_ROTATION:
-            return None
-        
-        self._angle += angle
+    def update(self, *args, **kwargs) -> None:
+        angle = settings.BUBBLE_SHOOTER_ROTATION_SPEED * self._rotation * kwargs["dt"]
+        self._rotation = 0
+        # stops at the limits (instead of before them), whatever the size of the step
+        new_angle = max(settings.BUBBLE_SHOOTER_MINIMUM_ROTATION, min(settings.BUBBLE_SHOOTER_MAXIMUM_ROTATION, self._angle + angle))
+        angle = new_angle - self._angle
+        if angle != 0:
+            self._angle = new_angle
+
+            self._shootDir.rotate_ip(angle)
+            self._arrow.rotate(angle)
 
-        self._shootDir.rotate_ip(angle)
-        self._arrow.rotate(angle)
+        super().update(*args, **kwargs)
 
     def register_on_shoot_event(self,callback):
         self._on_shoot_callbacks.append(callback)
@@ -1,5 +1,9 @@
 from enum import Enum
-from pygame.surface import Surface
+from typing import TYPE_CHECKING
+
+# pygame is only needed by the sprites, the colors are also used by the headless simulation
+if TYPE_CHECKING:
+    from pygame.surface import Surface
 
 class BubbleColor(Enum):
     RED = (255, 0, 0)
@@ -12,5 +16,9 @@ class BubbleColor(Enum):
     ORANGE = (223, 133, 0)
 
 
-bubble_sprites: dict[BubbleColor,list[Surface]] = {}
-colorList = list(BubbleColor)
\ No newline at end of file
+# frames of each color (the bubble and its pop animation), already scaled by the game scale.
+# Shared by every bubble, which only holds references to them
+bubble_sprites: dict[BubbleColor,list["Surface"]] = {}
+colorList = list(BubbleColor)
+# compact integer code of each color, used by array-backed storages (index in colorList)
+color_to_code: dict[BubbleColor,int] = {color: code for code,color in enumerate(colorList)}
@@ -3,12 +3,17 @@ from pygame import Vector2
 
 class KinematicPhysics(Physics):
     def __init__(self, pos, dir,acceleration=Vector2(0,0)) -> None:
-        super().__init__(pos, dir, Vector2(0,0))
-        self.acceleration = acceleration
+        self.reset(pos,dir,acceleration)
+
+    def reset(self, pos, dir,acceleration=Vector2(0,0)) -> None:
+        super().reset(pos, dir, Vector2(0,0))
+        # copied, change_horizontal_direction flips it
+        self.acceleration = acceleration.copy()
 
     def update(self, dt):
+        # speed in pixels per second, acceleration in pixels per second squared
         self.speed += Vector2(self.acceleration.x * self.direction.x,self.acceleration.y * self.direction.y) * dt
-        self.position += self.speed
+        self.position += self.speed * dt
 
     def change_horizontal_direction(self):
         self.speed.x *= -1
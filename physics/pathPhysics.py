@@ -0,0 +1,52 @@
+from physics.physics import Physics
+from pygame import Vector2
+
+class PathPhysics(Physics):
+    # moves along a polyline at a constant speed, whatever the dt (no step can skip a point of the path)
+    def __init__(self, path: list[Vector2], speed: float) -> None:
+        self.reset(path,speed)
+
+    def reset(self, path: list[Vector2], speed: float) -> None:
+        super().reset(path[0], Vector2(0,0), Vector2(speed,speed))
+        self.set_path(path)
+
+    @property
+    def finished(self):
+        return self._next_point >= len(self._path)
+
+    def set_path(self, path: list[Vector2]):
+        self._path = [point.copy() for point in path]
+        self._next_point = 1
+        self.position = self._path[0].copy()
+        self._update_direction()
+
+    def update(self, dt):
+        distance = self.speed.x * dt
+
+        while distance > 0 and not self.finished:
+            to_target = self._path[self._next_point] - self.position
+            length = to_target.length()
+
+            if length <= distance:
+                self.position = self._path[self._next_point].copy()
+                self._next_point += 1
+                distance -= length
+                self._update_direction()
+            else:
+                self.position += to_target * (distance / length)
+                distance = 0
+
+    def _update_direction(self):
+        if self.finished:
+            return
+
+        to_target = self._path[self._next_point] - self.position
+        if to_target.length_squared() > 0:
+            self.direction = to_target.normalize()
+
+    def change_horizontal_direction(self):
+        # the bounces are already part of the path
+        pass
+
+    def stop(self):
+        self._next_point = len(self._path)
@@ -3,6 +3,10 @@ from pygame import Vector2
 
 class Physics(ABC):
     def __init__(self,pos: Vector2,dir: Vector2,speed: Vector2) -> None:
+        Physics.reset(self,pos,dir,speed)
+
+    def reset(self,pos: Vector2,dir: Vector2,speed: Vector2) -> None:
+        # the subclasses reset with the arguments of their constructor, to be reused (see utils/pool.py)
         self.direction = dir.copy()
         self.speed = speed.copy()
         self.position = pos.copy()
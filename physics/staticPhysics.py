@@ -1,11 +1,14 @@
 from physics.physics import Physics
 from pygame import Vector2
-from utils.settings import GAME_SCALE
+from utils.settings import GAME_SCALE,BUBBLE_SHOT_SPEED
 
 class StaticPhysics(Physics):
-    def __init__(self, pos, dir=Vector2(0,0), speed=Vector2(200,200)) -> None:
+    def __init__(self, pos, dir=Vector2(0,0), speed=Vector2(BUBBLE_SHOT_SPEED,BUBBLE_SHOT_SPEED)) -> None:
         super().__init__(pos,dir, speed)
 
+    def reset(self, pos, dir=Vector2(0,0), speed=Vector2(BUBBLE_SHOT_SPEED,BUBBLE_SHOT_SPEED)) -> None:
+        super().reset(pos,dir,speed)
+
     def update(self, dt):
         self.position += Vector2(self.direction.x * self.speed.x * GAME_SCALE,self.direction.y * self.speed.y * GAME_SCALE) * dt
 
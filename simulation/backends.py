@@ -0,0 +1,16 @@
+from simulation.board import Board
+from simulation.bitboard import BitBoard
+import utils.settings as settings
+
+# board implementations, by the name used in the settings
+BOARD_BACKENDS: dict[str, type[Board]] = {
+    "array": Board,
+    "bitboard": BitBoard,
+}
+
+def board_class(backend: str = None) -> type[Board]:
+    # the backend of the settings when none is given
+    backend = backend if backend is not None else settings.BOARD_BACKEND
+    if backend not in BOARD_BACKENDS:
+        raise ValueError(f"Unknown board backend: {backend} (available: {', '.join(BOARD_BACKENDS)})")
+    return BOARD_BACKENDS[backend]
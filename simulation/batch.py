@@ -0,0 +1,133 @@
+import numpy as np
+from objects.arena.hexcoord import DIRECTION_OFFSETS
+from objects.colors import colorList, color_to_code
+from simulation.board import Board, EMPTY_CELL
+from simulation.rules import COLOR_POINTS
+
+# points of each color code (index = color code)
+_POINTS_BY_CODE = np.array([COLOR_POINTS.get(color, 0) for color in colorList], dtype=np.int64)
+
+class BatchSimulation:
+    # N independent boards in a single N x H x W array of color codes (EMPTY_CELL for empty cells).
+    # Each step places one bubble per board in the given landing cell (trajectories are chosen by the
+    # caller, for example from valid_landings) and resolves matches and floating bubbles for all boards
+    # at once with array operations.
+    def __init__(self, boards: np.ndarray, rng: np.random.Generator = None, lose_row: int = None) -> None:
+        if boards.ndim != 3:
+            raise ValueError("Boards must be an N x H x W array")
+
+        self.boards = boards.astype(np.int8, copy=True)
+        self.count, self.height, self.width = self.boards.shape
+        self._rng = rng if rng is not None else np.random.default_rng()
+        # a board is lost when a bubble reaches this row
+        self.lose_row = lose_row if lose_row is not None else self.height
+
+        rows, cols = np.indices((self.height, self.width))
+        self._hex_cells = (rows + cols) % 2 == 0
+
+        self.score = np.zeros(self.count, dtype=np.int64)
+        self.shots = np.zeros(self.count, dtype=np.int64)
+        self.lost = np.zeros(self.count, dtype=bool)
+        self._update_lost()
+
+        everyone = np.ones(self.count, dtype=bool)
+        self.current_colors = self._pick_colors(everyone)
+        self.next_colors = self._pick_colors(everyone)
+
+    @staticmethod
+    def from_board(board: Board, count: int, rng: np.random.Generator = None, lose_row: int = None) -> "BatchSimulation":
+        cells = np.full(board.width * board.height, EMPTY_CELL, dtype=np.int8)
+        for cell, color in board.occupied():
+            cells[cell] = color_to_code[color]
+
+        boards = np.broadcast_to(cells.reshape(board.height, board.width), (count, board.height, board.width))
+        return BatchSimulation(boards, rng, lose_row)
+
+    @property
+    def won(self) -> np.ndarray:
+        return ~(self.boards != EMPTY_CELL).any(axis=(1, 2))
+
+    @property
+    def over(self) -> np.ndarray:
+        return self.won | self.lost
+
+
+    def valid_landings(self) -> np.ndarray:
+        # empty hex cells where a bubble can stop: first row or next to another bubble
+        occupied = self.boards != EMPTY_CELL
+        attached = self._dilate(occupied)
+        attached[:, 0, :] = True
+        return attached & ~occupied & self._hex_cells
+
+    def step(self, rows: np.ndarray, cols: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        # shoots the current color of every board that isn't over into (rows[i], cols[i]),
+        # returning how many bubbles popped and fell on each board
+        rows, cols = np.asarray(rows), np.asarray(cols)
+        active = ~self.over
+        self.shots += active
+
+        inside = (rows >= 0) & (rows < self.height) & (cols >= 0) & (cols < self.width)
+        boards_index = np.arange(self.count)
+        safe_rows, safe_cols = np.where(inside, rows, 0), np.where(inside, cols, 0)
+        valid = active & inside & self._hex_cells[safe_rows, safe_cols] & \
+            (self.boards[boards_index, safe_rows, safe_cols] == EMPTY_CELL) & (self.current_colors != EMPTY_CELL)
+
+        landed = boards_index[valid]
+        self.boards[landed, rows[valid], cols[valid]] = self.current_colors[valid]
+
+        # matches: flood fill from the landing cell through the cells with the shot color
+        seed = np.zeros_like(self.boards, dtype=bool)
+        seed[landed, rows[valid], cols[valid]] = True
+        same_color = self.boards == self.current_colors[:, None, None]
+        matched = self._flood_fill(seed, same_color)
+        popped = matched & (matched.sum(axis=(1, 2)) >= 3)[:, None, None]
+
+        # floating: bubbles not reached by a flood fill from the first row, only on boards that popped
+        popped_boards = popped.any(axis=(1, 2))
+        occupied = (self.boards != EMPTY_CELL) & ~popped
+        anchors = np.zeros_like(occupied)
+        anchors[:, 0, :] = occupied[:, 0, :]
+        floating = occupied & ~self._flood_fill(anchors, occupied) & popped_boards[:, None, None]
+
+        removed = popped | floating
+        self.score += np.where(removed, _POINTS_BY_CODE[np.maximum(self.boards, 0)], 0).sum(axis=(1, 2))
+        self.boards[removed] = EMPTY_CELL
+
+        self.current_colors = np.where(active, self.next_colors, self.current_colors)
+        self.next_colors = np.where(active, self._pick_colors(active), self.next_colors)
+        self._update_lost()
+
+        return popped.sum(axis=(1, 2)), floating.sum(axis=(1, 2))
+
+
+    def _flood_fill(self, seed: np.ndarray, allowed: np.ndarray) -> np.ndarray:
+        # grows every region by one cell per iteration until no board changes
+        region = seed & allowed
+        while True:
+            grown = region | (self._dilate(region) & allowed)
+            if np.array_equal(grown, region):
+                return region
+            region = grown
+
+    def _dilate(self, mask: np.ndarray) -> np.ndarray:
+        # cells with at least one neighbor in the mask (in the HexDirection offsets)
+        result = np.zeros_like(mask)
+        for d_row, d_col in DIRECTION_OFFSETS:
+            dst_rows = slice(max(0, -d_row), self.height - max(0, d_row))
+            src_rows = slice(max(0, d_row), self.height - max(0, -d_row))
+            dst_cols = slice(max(0, -d_col), self.width - max(0, d_col))
+            src_cols = slice(max(0, d_col), self.width - max(0, -d_col))
+            result[:, dst_rows, dst_cols] |= mask[:, src_rows, src_cols]
+        return result
+
+    def _pick_colors(self, boards: np.ndarray) -> np.ndarray:
+        # uniform choice between the colors present on each board (EMPTY_CELL if there is none)
+        present = np.stack([(self.boards == code).any(axis=(1, 2)) for code in range(len(colorList))], axis=1)
+        counts = present.sum(axis=1)
+        choice = np.floor(self._rng.random(self.count) * counts)
+        picked = np.argmax(np.cumsum(present, axis=1) > choice[:, None], axis=1)
+        return np.where(boards & (counts > 0), picked, EMPTY_CELL).astype(np.int8)
+
+    def _update_lost(self) -> None:
+        if self.lose_row < self.height:
+            self.lost |= (self.boards[:, self.lose_row:, :] != EMPTY_CELL).any(axis=(1, 2))
@@ -0,0 +1,147 @@
+from typing import Iterable
+from collections import OrderedDict
+from objects.arena.hexcoord import HexCoord, DIRECTION_OFFSETS
+from objects.colors import BubbleColor, colorList
+from simulation.board import Board, EMPTY_CELL
+
+class BitBoard(Board):
+    # Board that also keeps one big-int bitmask per color (bit i is the cell i = row * width + col,
+    # the same doubled-column layout of HexCoord). The six neighbors of every cell of a mask are a shift
+    # each (by d_row * width + d_col), so the flood fills, the floating check and the present colors are
+    # a few bitwise operations over the whole board instead of a search cell by cell.
+
+    # (shift, source mask) of every direction for each size ((width, height) -> shifts), the source mask
+    # keeps only the cells whose neighbor in that direction is inside the board (no wrapping between rows).
+    # Shared like the neighbor tables (the last Board.SHARED_TABLES sizes)
+    _direction_shifts: OrderedDict[tuple[int, int], tuple[tuple[int, int], ...]] = OrderedDict()
+
+    def __init__(
+        self,
+        width: int, height: int,
+        real_width: float = None, real_height: float = None,
+        top_left: tuple[float, float] = (0, 0)
+    ) -> None:
+        super().__init__(width, height, real_width, real_height, top_left)
+
+        # color code -> cells with that color, and every occupied cell
+        self._color_masks = [0] * len(colorList)
+        self._occupied_mask = 0
+
+        self._first_row_mask = (1 << self.width) - 1
+        self._shifts = self._shared_table(BitBoard._direction_shifts, self._build_direction_shifts)
+
+    def copy(self) -> "BitBoard":
+        board = super().copy()
+        board._color_masks = list(self._color_masks)
+        return board
+
+    def _build_direction_shifts(self) -> tuple[tuple[int, int], ...]:
+        shifts = []
+        for d_row, d_col in DIRECTION_OFFSETS:
+            source_mask = 0
+            for row in range(max(0, -d_row), self.height - max(0, d_row)):
+                for col in range(max(0, -d_col), self.width - max(0, d_col)):
+                    source_mask |= 1 << (row * self.width + col)
+            shifts.append((d_row * self.width + d_col, source_mask))
+        return tuple(shifts)
+
+
+    def add(self, coord: HexCoord, color: BubbleColor) -> int | None:
+        cell = super().add(coord, color)
+        if cell is not None:
+            self._set_cell(cell, self._cell_colors[cell])
+        return cell
+
+    def load_cells(self, cells: Iterable[tuple[int, int]]) -> None:
+        cells = list(cells)
+        super().load_cells(cells)
+        for cell, code in cells:
+            self._set_cell(cell, code)
+
+    def remove(self, cell: int) -> bool:
+        code = self._cell_colors[cell]
+        if not super().remove(cell):
+            return False
+
+        bit = 1 << cell
+        self._color_masks[code] &= ~bit
+        self._occupied_mask &= ~bit
+        return True
+
+    def _set_cell(self, cell: int, code: int) -> None:
+        bit = 1 << cell
+        self._color_masks[code] |= bit
+        self._occupied_mask |= bit
+
+
+    def pop_from(self, coord: HexCoord) -> tuple[list[tuple[int, BubbleColor]], list[tuple[int, BubbleColor]]] | None:
+        # same as Board.pop_from, with the match and the floating bubbles found as masks
+        if not self.in_bounds(coord):
+            return None
+
+        cell = self.cell_index(coord)
+        code = self._cell_colors[cell]
+        if code == EMPTY_CELL:
+            return None
+
+        matched = self._fill(1 << cell, self._color_masks[code])
+        if matched.bit_count() < 3:
+            return None
+
+        remaining = self._occupied_mask & ~matched
+        floating = remaining & ~self._fill(remaining & self._first_row_mask, remaining)
+
+        popped = [(c, colorList[code]) for c in self._cells(matched)]
+        floating_cells = [(c, colorList[self._cell_colors[c]]) for c in self._cells(floating)]
+
+        for c, _ in popped:
+            Board.remove(self, c)
+        for c, _ in floating_cells:
+            Board.remove(self, c)
+
+        removed = matched | floating
+        self._color_masks = [mask & ~removed for mask in self._color_masks]
+        self._occupied_mask &= ~removed
+        self._all_anchored = True
+
+        return popped, floating_cells
+
+    def flood_fill(self, start_cells: Iterable[int], color_code: int = None) -> list[int]:
+        # same cells as the breadth-first search, in increasing order
+        allowed = self._occupied_mask if color_code is None else self._color_masks[color_code]
+
+        seed = 0
+        for cell in start_cells:
+            seed |= 1 << cell
+
+        return self._cells(self._fill(seed, allowed))
+
+    def floating_cells(self, removed_cells: Iterable[int] = None) -> list[int]:
+        # a single fill from the first row is already cheap, so the removed cells aren't needed
+        occupied = self._occupied_mask
+        anchored = self._fill(occupied & self._first_row_mask, occupied)
+        return self._cells(occupied & ~anchored)
+
+    def _fill(self, seed: int, allowed: int) -> int:
+        # grows the region by all its neighbors at once until it stops changing
+        region = seed & allowed
+        shifts = self._shifts
+        while True:
+            grown = region
+            for shift, source_mask in shifts:
+                source = region & source_mask
+                grown |= (source << shift) if shift > 0 else (source >> -shift)
+            grown &= allowed
+
+            if grown == region:
+                return region
+            region = grown
+
+    @staticmethod
+    def _cells(mask: int) -> list[int]:
+        cells = []
+        while mask:
+            lowest = mask & -mask
+            cells.append(lowest.bit_length() - 1)
+            mask ^= lowest
+        return cells
@@ -0,0 +1,483 @@
+from typing import Callable, Iterable, Iterator, TypeVar
+from array import array
+from collections import OrderedDict, deque
+from threading import Lock
+from math import floor, ceil
+from objects.arena.hexcoord import HexCoord, DIRECTION_OFFSETS
+from objects.colors import BubbleColor, colorList, color_to_code
+import utils.settings as settings
+
+# color code stored in the occupancy array for cells without a bubble
+EMPTY_CELL = -1
+
+Table = TypeVar("Table")
+
+class Board:
+    # state and rules of a hex grid, without any sprite (cells are row-major indexes: row * width + col)
+
+    # neighbor tables never change, so boards with the same size share one ((width, height) -> table).
+    # Only the tables of the last SHARED_TABLES sizes are kept (a board keeps its own table alive), and the
+    # boards may be created in the level prefetch thread too
+    SHARED_TABLES = 8
+    _neighbor_tables: OrderedDict[tuple[int, int], list[tuple[int, ...]]] = OrderedDict()
+    _tables_lock = Lock()
+
+    def __init__(
+        self,
+        width: int, height: int,
+        real_width: float = None, real_height: float = None,
+        top_left: tuple[float, float] = (0, 0)
+    ) -> None:
+        self.width = width
+        self.height = height
+        if self.width < 1 or self.height < 1:
+            raise ValueError("Width and height must be at least 1")
+
+        self.real_width = real_width if real_width is not None else self.width
+        self.real_height = real_height if real_height is not None else self.height
+        if self.real_width <= 0 or self.real_height <= 0:
+            raise ValueError("Real width and height must be positive")
+
+        self.top_left = top_left
+        self.scale = (self.real_width / self.width, self.real_height / self.height)
+        self._calculate_playable_area()
+
+        # occupancy store: flat array with the color code of each cell, plus the occupied cells
+        # in insertion order (cell -> color code)
+        self._cell_colors = array("b",[EMPTY_CELL]) * (self.width * self.height)
+        self._occupied: dict[int,int] = {}
+        # number of bubbles of each color code, and the present colors (only built again when a count
+        # reaches or leaves 0), so the color queries don't look at the cells
+        self._color_counts = [0] * len(colorList)
+        self._present_colors: frozenset[BubbleColor] | None = frozenset()
+        # number of bubbles of each row and the lowest row with a bubble (-1 when empty), checked every frame
+        self._row_counts = array("i",[0]) * self.height
+        self._lowest_row = -1
+        self._neighbor_table = self._shared_table(Board._neighbor_tables, self._build_neighbor_table)
+        # true while every bubble is known to be connected to the first row,
+        # which allows the floating check to only look around removed cells
+        self._all_anchored = True
+        # incremented on every change of the bubbles or of the board position
+        self._version = 0
+
+    def copy(self) -> "Board":
+        # the neighbor table is shared between the copies
+        board = type(self).__new__(type(self))
+        board.__dict__.update(self.__dict__)
+        board._cell_colors = array("b",self._cell_colors)
+        board._occupied = dict(self._occupied)
+        board._color_counts = list(self._color_counts)
+        board._row_counts = array("i",self._row_counts)
+        return board
+
+    def _shared_table(self, tables: OrderedDict[tuple[int, int], Table], build: Callable[[], Table]) -> Table:
+        # table of this size from tables (LRU), built when missing
+        key = (self.width, self.height)
+        with Board._tables_lock:
+            table = tables.get(key, None)
+            if table is not None:
+                tables.move_to_end(key)
+                return table
+
+        table = build()
+        with Board._tables_lock:
+            table = tables.setdefault(key, table)
+            tables.move_to_end(key)
+            if len(tables) > Board.SHARED_TABLES:
+                tables.popitem(last=False)
+        return table
+
+    def state_key(self) -> bytes:
+        # hashable snapshot of the cells (not of the position)
+        return self._cell_colors.tobytes()
+
+    @property
+    def version(self) -> int:
+        return self._version
+
+    @property
+    def is_empty(self) -> bool:
+        return not self._occupied
+
+    def __len__(self) -> int:
+        return len(self._occupied)
+
+
+    def in_bounds(self, coord: HexCoord) -> bool:
+        return 0 <= coord.row < self.height and 0 <= coord.col < self.width
+
+    def cell_index(self, coord: HexCoord) -> int:
+        return coord.row * self.width + coord.col
+
+    def cell_coord(self, cell: int) -> HexCoord:
+        return HexCoord(*divmod(cell,self.width))
+
+    def _build_neighbor_table(self) -> list[tuple[int, ...]]:
+        # in-bounds neighbor cells of every cell, in the HexDirection order (empty for non hex cells)
+        table = []
+        for row in range(self.height):
+            for col in range(self.width):
+                if not HexCoord.is_valid(row, col):
+                    table.append(())
+                    continue
+
+                table.append(tuple(
+                    (row + d_row) * self.width + col + d_col
+                    for d_row, d_col in DIRECTION_OFFSETS
+                    if 0 <= row + d_row < self.height and 0 <= col + d_col < self.width
+                ))
+        return table
+
+    def neighbor_cells(self, cell: int) -> tuple[int, ...]:
+        return self._neighbor_table[cell]
+
+    def color_at(self, cell: int) -> BubbleColor | None:
+        code = self._cell_colors[cell]
+        return colorList[code] if code != EMPTY_CELL else None
+
+    def occupied(self) -> Iterator[tuple[int, BubbleColor]]:
+        for cell, code in self._occupied.items():
+            yield cell, colorList[code]
+
+    def is_valid_coord(self, coord: HexCoord) -> bool:
+        if not self.in_bounds(coord):
+            return False
+        elif self._cell_colors[self.cell_index(coord)] != EMPTY_CELL:
+            return False
+        return True
+
+
+    def add(self, coord: HexCoord, color: BubbleColor) -> int | None:
+        if not self.is_valid_coord(coord):
+            return None
+
+        cell = self.cell_index(coord)
+        if coord.row != 0 and not any(self._cell_colors[n] != EMPTY_CELL for n in self._neighbor_table[cell]):
+            self._all_anchored = False
+
+        code = color_to_code[color]
+        self._cell_colors[cell] = code
+        self._occupied[cell] = code
+        self._count_color(code, 1)
+        self._count_row(cell, 1)
+        self._version += 1
+        return cell
+
+    def load_cells(self, cells: Iterable[tuple[int, int]]) -> None:
+        # adds trusted (cell, color code) pairs without any check, e.g. from a compiled level
+        for cell, code in cells:
+            self._cell_colors[cell] = code
+            self._occupied[cell] = code
+            self._count_color(code, 1)
+            self._count_row(cell, 1)
+
+        # not known, the first floating check will look at every bubble
+        self._all_anchored = False
+        self._version += 1
+
+    def remove(self, cell: int) -> bool:
+        # only removes the bubble: the bubbles it held may now float, and stay until drop_floating is called
+        # with the removed cells (or without, which checks every bubble)
+        code = self._occupied.pop(cell, None)
+        if code is None:
+            return False
+
+        self._count_color(code, -1)
+        self._count_row(cell, -1)
+        self._cell_colors[cell] = EMPTY_CELL
+        self._version += 1
+        return True
+
+    def shift_down(self, rows: int) -> list[int]:
+        # moves every bubble the given number of rows down (even, so the cells stay hex cells), the bubbles
+        # moved past the last row are removed. Returns the removed cells (from before the move)
+        if rows < 0 or rows % 2 != 0:
+            raise ValueError("Rows must be a positive even number")
+
+        shift = rows * self.width
+        size = self.width * self.height
+        cells = list(self._occupied.items())
+        for cell, _ in cells:
+            self.remove(cell)
+        self.load_cells((cell + shift, code) for cell, code in cells if cell + shift < size)
+
+        return [cell for cell, _ in cells if cell + shift >= size]
+
+    def pop_from(self, coord: HexCoord) -> tuple[list[tuple[int, BubbleColor]], list[tuple[int, BubbleColor]]] | None:
+        # removes the group of 3 or more bubbles with the color of the coordinate and the bubbles
+        # left floating, returning both (cell and color of each), or None if nothing popped
+        if not self.in_bounds(coord) or self._cell_colors[self.cell_index(coord)] == EMPTY_CELL:
+            return None
+
+        cell = self.cell_index(coord)
+        connected = self.flood_fill((cell,), self._cell_colors[cell])
+        if len(connected) < 3:
+            return None
+
+        popped = [(c, colorList[self._cell_colors[c]]) for c in connected]
+        for c in connected:
+            self.remove(c)
+
+        return popped, self.drop_floating(connected)
+
+    def drop_floating(self, removed_cells: Iterable[int] = None) -> list[tuple[int, BubbleColor]]:
+        # removes the floating bubbles (see floating_cells) and returns them (cell and color of each),
+        # every bubble left is then connected to the first row
+        floating = [(c, colorList[self._cell_colors[c]]) for c in self.floating_cells(removed_cells)]
+        for c, _ in floating:
+            self.remove(c)
+        self._all_anchored = True
+        return floating
+
+    def _count_color(self, code: int, amount: int) -> None:
+        count = self._color_counts[code]
+        self._color_counts[code] = count + amount
+        if count == 0 or count + amount == 0:
+            self._present_colors = None
+
+    def _count_row(self, cell: int, amount: int) -> None:
+        row = cell // self.width
+        self._row_counts[row] += amount
+        if amount > 0 and row > self._lowest_row:
+            self._lowest_row = row
+        elif row == self._lowest_row and self._row_counts[row] == 0:
+            # the rows above are only looked at when the lowest one is emptied
+            lowest = row
+            while lowest >= 0 and self._row_counts[lowest] == 0:
+                lowest -= 1
+            self._lowest_row = lowest
+
+    def present_colors(self) -> frozenset[BubbleColor]:
+        if self._present_colors is None:
+            self._present_colors = frozenset(colorList[code] for code, count in enumerate(self._color_counts) if count)
+        return self._present_colors
+
+    def color_count(self, color: BubbleColor) -> int:
+        return self._color_counts[color_to_code[color]]
+
+    def color_counts(self) -> dict[BubbleColor, int]:
+        # histogram of the present colors
+        return {colorList[code]: count for code, count in enumerate(self._color_counts) if count}
+
+
+    def flood_fill(self, start_cells: Iterable[int], color_code: int = None) -> list[int]:
+        # breadth-first search over occupied cells (of the given color, if any) from all start cells at once
+        colors = self._cell_colors
+        neighbor_table = self._neighbor_table
+        matches = (lambda c: colors[c] != EMPTY_CELL) if color_code is None else (lambda c: colors[c] == color_code)
+
+        visited = set()
+        queue = deque()
+        for cell in start_cells:
+            if cell not in visited and matches(cell):
+                visited.add(cell)
+                queue.append(cell)
+
+        filled = []
+        while queue:
+            cell = queue.popleft()
+            filled.append(cell)
+
+            for neighbor in neighbor_table[cell]:
+                if neighbor not in visited and matches(neighbor):
+                    visited.add(neighbor)
+                    queue.append(neighbor)
+
+        return filled
+
+    def connected_cells(self, coord: HexCoord, color: BubbleColor = None) -> list[int]:
+        if not self.in_bounds(coord):
+            return []
+
+        color_code = color_to_code[color] if color is not None else None
+        return self.flood_fill((self.cell_index(coord),), color_code)
+
+    def floating_cells(self, removed_cells: Iterable[int] = None) -> list[int]:
+        # without removed cells (or when some bubble may already be floating) every bubble is checked.
+        # The removed cells must be every cell removed since the last drop_floating (or pop_from), otherwise
+        # bubbles held by the others are missed. Only finds the cells, drop_floating also removes them
+        if removed_cells is None or not self._all_anchored:
+            return self._all_floating_cells()
+        return self._floating_cells_around(removed_cells)
+
+    def _all_floating_cells(self) -> list[int]:
+        # single flood fill from every bubble of the first row (cells 0 to width - 1)
+        anchored = set(self.flood_fill(range(self.width)))
+        return [cell for cell in self._occupied if cell not in anchored]
+
+    def _floating_cells_around(self, removed_cells: Iterable[int]) -> list[int]:
+        # only the components next to the removed cells may have lost their connection to the first row
+        colors = self._cell_colors
+        neighbor_table = self._neighbor_table
+        anchored = set()
+        floating = set()
+        floating_cells = []
+
+        for removed in removed_cells:
+            for start in neighbor_table[removed]:
+                if colors[start] == EMPTY_CELL or start in anchored or start in floating:
+                    continue
+
+                # depth-first search that tries the upper neighbors first, stopping as soon as it reaches
+                # the first row or a cell already known to be anchored
+                visited = {start}
+                stack = deque([start])
+                reached_top = False
+                while stack:
+                    cell = stack.pop()
+                    if cell < self.width or cell in anchored:
+                        reached_top = True
+                        break
+
+                    for neighbor in reversed(neighbor_table[cell]):
+                        if neighbor not in visited and colors[neighbor] != EMPTY_CELL:
+                            visited.add(neighbor)
+                            stack.append(neighbor)
+
+                if reached_top:
+                    anchored.update(visited)
+                else:
+                    floating.update(visited)
+                    floating_cells.extend(visited)
+
+        return floating_cells
+
+
+    def lowest_row(self) -> int | None:
+        return self._lowest_row if self._lowest_row >= 0 else None
+
+    def reaches(self, y: float, margin: float = 0) -> bool:
+        # true if the center of the lowest bubble plus the margin is past the given y
+        row = self.lowest_row()
+        return row is not None and self.playable_top_left[1] + row * self.playable_scale[1] + margin > y
+
+    def move_down(self, amount: float) -> None:
+        # the size doesn't change, only the position
+        self.top_left = (self.top_left[0],self.top_left[1] + amount)
+        self._calculate_playable_top_left()
+        self._version += 1
+
+    def _calculate_playable_area(self) -> None:
+        self.playable_width = self.real_width - 20
+        self.playable_height = self.real_height - 10
+        self.playable_scale = (self.playable_width / self.width, self.playable_height / self.height)
+        self._calculate_playable_top_left()
+
+    def _calculate_playable_top_left(self) -> None:
+        scale_x, scale_y = self.playable_scale
+        top_left_x, top_left_y = self.top_left
+        top_left_x, top_left_y = (top_left_x + scale_x / 2, top_left_y + scale_y / 2)
+        self.playable_top_left = (top_left_x + 3 * settings.GAME_SCALE, top_left_y + 3 * settings.GAME_SCALE)
+
+    def cells_near(self, position: tuple[float, float], distance: float) -> list[int]:
+        # broad phase: occupied cells whose centers may be within the distance of the position
+        x, y = position
+        min_row, min_col = self.pixel_to_arena((x - distance, y - distance))
+        max_row, max_col = self.pixel_to_arena((x + distance, y + distance))
+
+        min_row, max_row = max(0, floor(min_row)), min(self.height - 1, ceil(max_row))
+        min_col, max_col = max(0, floor(min_col)), min(self.width - 1, ceil(max_col))
+
+        colors = self._cell_colors
+        cells = []
+        for row in range(min_row, max_row + 1):
+            first_cell = row * self.width
+            for col in range(min_col + (row + min_col) % 2, max_col + 1, 2):
+                if colors[first_cell + col] != EMPTY_CELL:
+                    cells.append(first_cell + col)
+
+        return cells
+
+    def pixel_to_arena(self, position: tuple[float, float]) -> tuple[float, float]:
+        x, y = position
+        scale_x, scale_y = self.playable_scale
+        top_left_x, top_left_y = self.playable_top_left
+
+        pixel_arena_x, pixel_arena_y = x - top_left_x, y - top_left_y
+        return pixel_arena_y / scale_y, pixel_arena_x / scale_x
+
+    def pixel_to_hex(self, position: tuple[float, float]) -> HexCoord:
+        # pixel -> arena
+        arena_row, arena_col = self.pixel_to_arena(position)
+
+        # arena -> hex (rounded)
+        rounded_row = round(arena_row)
+        rounded_col = round(arena_col)
+        row_multiplier, col_multiplier = 2, 1
+        diff_fn = lambda c: row_multiplier * abs(c.row - arena_row) + col_multiplier * abs(c.col - arena_col)
+
+        # non hex -> hex (closest between left and right)
+        if not HexCoord.is_valid(rounded_row, rounded_col):
+            left_coord = HexCoord(rounded_row, rounded_col - 1)
+            right_coord = HexCoord(rounded_row, rounded_col + 1)
+            rounded_col = min([left_coord, right_coord], key=diff_fn).col
+
+        # possible hex coord + neighbors
+        coord = HexCoord(rounded_row, rounded_col)
+        neighbors = coord.neighbors()
+        neighbors.sort(key=diff_fn)
+
+        # find the first valid neighbor (or the original coord)
+        while not self.is_valid_coord(coord) and neighbors:
+            coord = neighbors.pop(0)
+
+        # not found (e.g. the position is inside the grid): the closest free cell further away.
+        # With no free cell left the coord stays invalid, and adding a bubble there fails
+        if not self.is_valid_coord(coord):
+            coord = self.nearest_free_coord(position) or coord
+
+        return coord
+
+    def nearest_free_coord(self, position: tuple[float, float]) -> HexCoord | None:
+        # free cell closest to the position among the ones a bubble can stick to (first row, or next to a bubble),
+        # searched ring by ring from the cell of the position (None when there is none)
+        arena_row, arena_col = self.pixel_to_arena(position)
+        row = min(max(round(arena_row), 0), self.height - 1)
+        col = min(max(round(arena_col), 0), self.width - 1)
+        if not HexCoord.is_valid(row, col):
+            # a one column board only has the even rows
+            row, col = (row, col + 1 if col + 1 < self.width else col - 1) if self.width > 1 else (row - 1, col)
+
+        colors = self._cell_colors
+        table = self._neighbor_table
+        x, y = position
+
+        def distance(cell: int) -> float:
+            center_x, center_y = self.cell_center(cell)
+            return (center_x - x) ** 2 + (center_y - y) ** 2
+
+        start = row * self.width + col
+        visited = {start}
+        ring = [start]
+        while ring:
+            free = [
+                cell for cell in ring
+                if colors[cell] == EMPTY_CELL and (cell < self.width or any(colors[n] != EMPTY_CELL for n in table[cell]))
+            ]
+            if free:
+                return self.cell_coord(min(free, key=distance))
+
+            next_ring = []
+            for cell in ring:
+                for neighbor in table[cell]:
+                    if neighbor not in visited:
+                        visited.add(neighbor)
+                        next_ring.append(neighbor)
+            ring = next_ring
+
+        return None
+
+    def hex_to_pixel(self, hex_coord: HexCoord) -> tuple[float, float]:
+        scale_x, scale_y = self.playable_scale
+        top_left_x, top_left_y = self.playable_top_left
+
+        pixel_arena_x = hex_coord.col * scale_x
+        pixel_arena_y = hex_coord.row * scale_y
+
+        return pixel_arena_x + top_left_x, pixel_arena_y + top_left_y
+
+    def cell_center(self, cell: int) -> tuple[float, float]:
+        row, col = divmod(cell, self.width)
+        scale_x, scale_y = self.playable_scale
+        top_left_x, top_left_y = self.playable_top_left
+        return col * scale_x + top_left_x, row * scale_y + top_left_y
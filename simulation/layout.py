@@ -0,0 +1,62 @@
+import utils.settings as settings
+from utils.settings import GAME_SCALE
+
+class ArenaLayout:
+    # geometry of an arena in (scaled) pixels, without any image
+    def __init__(
+        self,
+        bg_size: tuple[float, float], bg_floor_height: float,
+        arena_topleft: tuple[float, float], arena_size: tuple[float, float], wall_thickness: float,
+        grid_topleft: tuple[float, float], grid_size: tuple[float, float],
+        floor_position: tuple[float, float], floor_size: tuple[float, float],
+        arena_down_cd: float, arena_down_move_amount: float, arena_down_transition_duration: float
+    ) -> None:
+        self.bg_size = bg_size
+        self.bg_floor_height = bg_floor_height
+        self.arena_topleft = arena_topleft
+        self.arena_size = arena_size
+        self.wall_thickness = wall_thickness
+        self.grid_topleft = grid_topleft
+        self.grid_size = grid_size
+        self.floor_position = floor_position
+        self.floor_size = floor_size
+        self.arena_down_cd = arena_down_cd
+        self.arena_down_move_amount = arena_down_move_amount
+        self.arena_down_transition_duration = arena_down_transition_duration
+
+    @property
+    def wall_xs(self) -> list[float]:
+        return [self.arena_topleft[0] + self.wall_thickness, self.arena_topleft[0] + self.arena_size[0]]
+
+    @property
+    def ceiling_position(self) -> tuple[float, float]:
+        return (self.grid_topleft[0], self.arena_topleft[1])
+
+    @property
+    def ceiling_y(self) -> float:
+        return self.arena_topleft[1]
+
+    @property
+    def floor_y(self) -> float:
+        return self.floor_position[1]
+
+    @property
+    def shooter_position(self) -> tuple[float, float]:
+        shooter_height_center = 20 * GAME_SCALE
+        return (self.grid_topleft[0] + self.grid_size[0] / 2, self.bg_size[1] - self.bg_floor_height - shooter_height_center)
+
+    @property
+    def next_bubble_position(self) -> tuple[float, float]:
+        return (self.shooter_position[0] - 30 * GAME_SCALE, self.bg_size[1] - self.bg_floor_height - settings.BUBBLE_RADIUS)
+
+
+# layout of the metal map (sprites/bg.png)
+METAL_LAYOUT = ArenaLayout(
+    bg_size=(320 * GAME_SCALE, 232 * GAME_SCALE), bg_floor_height=8 * GAME_SCALE,
+    arena_topleft=(88 * GAME_SCALE, 16 * GAME_SCALE), arena_size=(136 * GAME_SCALE, 207 * GAME_SCALE),
+    wall_thickness=6 * GAME_SCALE,
+    grid_topleft=(96 * GAME_SCALE, 24 * GAME_SCALE), grid_size=(127 * GAME_SCALE, 199 * GAME_SCALE),
+    floor_position=(96 * GAME_SCALE, 181 * GAME_SCALE), floor_size=(128 * GAME_SCALE, 4 * GAME_SCALE),
+    # the arena moves down every 30 seconds, during 3 seconds
+    arena_down_cd=30, arena_down_move_amount=20 * GAME_SCALE, arena_down_transition_duration=3
+)
@@ -0,0 +1,43 @@
+from abc import ABC, abstractmethod
+from objects.colors import BubbleColor, colorList
+from simulation.board import Board
+from simulation.rules import pick_color
+import utils.settings as settings
+
+class RowGenerator(ABC):
+    # rows pushed in at the top of the grid in endless mode, each one produced when it's pushed.
+    # A row is the color of each of its cells from left to right (None leaves the cell empty)
+    @abstractmethod
+    def next_row(self, cells: int, board: Board) -> list[BubbleColor | None]:
+        pass
+
+
+class RandomRowGenerator(RowGenerator):
+    # full rows of colors picked at random among the given ones
+    def __init__(self, rng, colors: frozenset[BubbleColor] = None) -> None:
+        self._rng = rng
+        self._colors = colors if colors is not None else frozenset(colorList[:settings.ENDLESS_COLOR_COUNT])
+
+    def next_row(self, cells: int, board: Board) -> list[BubbleColor | None]:
+        return [pick_color(self._colors, self._rng) for _ in range(cells)]
+
+
+class PresentColorsRowGenerator(RandomRowGenerator):
+    # like RandomRowGenerator, only with the colors still in the board (once one is cleared it doesn't come back)
+    def next_row(self, cells: int, board: Board) -> list[BubbleColor | None]:
+        colors = board.present_colors() or self._colors
+        return [pick_color(colors, self._rng) for _ in range(cells)]
+
+
+# row generators, by the name used in the settings
+ROW_GENERATORS: dict[str, type[RowGenerator]] = {
+    "random": RandomRowGenerator,
+    "present_colors": PresentColorsRowGenerator,
+}
+
+def row_generator(rng, name: str = None) -> RowGenerator:
+    # the generator of the settings when none is given
+    name = name if name is not None else settings.ENDLESS_ROW_GENERATOR
+    if name not in ROW_GENERATORS:
+        raise ValueError(f"Unknown row generator: {name} (available: {', '.join(ROW_GENERATORS)})")
+    return ROW_GENERATORS[name](rng)
@@ -0,0 +1,66 @@
+from objects.colors import BubbleColor, color_to_code
+import utils.settings as settings
+
+COLOR_POINTS: dict[BubbleColor,int] = {
+    BubbleColor.RED: 1,
+    BubbleColor.GREEN: 2,
+    BubbleColor.BLUE: 3,
+    BubbleColor.YELLOW: 4,
+    BubbleColor.BLACK: 5,
+    BubbleColor.GRAY: 6,
+    BubbleColor.PURPLE: 7,
+    BubbleColor.ORANGE: 8
+}
+
+# the bottom of a grid bubble sprite is this far below its center (used to check if it touches the floor)
+BUBBLE_SPRITE_HALF_HEIGHT = settings.BUBBLE_SPRITE_SIZE * settings.GAME_SCALE / 2
+
+
+def pick_color(colors: frozenset[BubbleColor], rng) -> BubbleColor | None:
+    # colors are sorted so the choice only depends on the random generator (sets of enums have no fixed order)
+    colors = sorted(colors, key=color_to_code.get)
+    return rng.choice(colors) if len(colors) > 0 else None
+
+
+class Descent:
+    # every cooldown, the ceiling moves down the move amount during the transition duration
+    def __init__(self, cooldown: float, move_amount: float, transition_duration: float) -> None:
+        self._cooldown = cooldown
+        self._move_amount = move_amount
+        self._transition_duration = transition_duration
+
+        self._current_time = cooldown
+        self._moving = False
+        self._current_move_time = 0
+        self._initial_offset = 0
+        self.offset = 0
+        # moves finished so far
+        self.moves = 0
+
+    @property
+    def moving(self) -> bool:
+        return self._moving
+
+    def update(self, dt: float) -> float:
+        # returns how much the ceiling moved down. The times are compared with half an update of margin, so the
+        # descent starts and ends on the same update (and at the same offset) whatever the duration of the updates
+        self._current_time -= dt
+
+        if self._current_time <= dt / 2:
+            self._initial_offset = self.offset
+            self._moving = True
+            self._current_move_time = 0
+            self._current_time = self._cooldown
+
+        if not self._moving:
+            return 0
+
+        self._current_move_time += dt
+        self._moving = self._current_move_time < self._transition_duration - dt / 2
+        weight = self._current_move_time / self._transition_duration if self._moving else 1
+        new_offset = self._initial_offset + self._move_amount * weight
+        amount = new_offset - self.offset
+        self.offset = new_offset
+        if not self._moving:
+            self.moves += 1
+        return amount
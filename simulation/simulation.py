@@ -0,0 +1,78 @@
+import random
+from objects.arena.hexcoord import HexCoord
+from objects.colors import BubbleColor
+from simulation.board import Board
+from simulation.layout import ArenaLayout, METAL_LAYOUT
+from simulation.rules import COLOR_POINTS, BUBBLE_SPRITE_HALF_HEIGHT, Descent, pick_color
+from simulation.trajectory import TrajectorySolver
+
+class Simulation:
+    # headless game over a board: shots land instantly (no flight or pop animations) and nothing is drawn
+    def __init__(self, board: Board, layout: ArenaLayout = METAL_LAYOUT, rng: random.Random = None) -> None:
+        self.board = board
+        self.layout = layout
+        self._rng = rng if rng is not None else random.Random()
+
+        self._trajectory = TrajectorySolver(board, layout.wall_xs, layout.ceiling_y)
+        self._descent = Descent(layout.arena_down_cd, layout.arena_down_move_amount, layout.arena_down_transition_duration)
+
+        self.score = 0
+        self.shots = 0
+        self.time = 0.0
+        self._lost = False
+
+        self.current_color = self._pick_color()
+        self.next_color = self._pick_color()
+
+    @property
+    def won(self) -> bool:
+        return self.board.is_empty
+
+    @property
+    def lost(self) -> bool:
+        return self._lost
+
+    @property
+    def over(self) -> bool:
+        return self.won or self.lost
+
+    def predict_landing(self, direction: tuple[float, float]) -> tuple[HexCoord | None, list[tuple[float, float]]]:
+        return self._trajectory.predict_landing(self.layout.shooter_position, direction)
+
+    def shoot(self, direction: tuple[float, float]) -> tuple[HexCoord | None, list[tuple[int, BubbleColor]], list[tuple[int, BubbleColor]]] | None:
+        # returns the landing cell, the popped and the floating bubbles (or None if the game is over)
+        if self.over:
+            return None
+
+        color = self.current_color
+        self.current_color = self.next_color
+        self.next_color = self._pick_color()
+        self.shots += 1
+
+        landing, _ = self.predict_landing(direction)
+        if landing is None or self.board.add(landing, color) is None:
+            return None, [], []
+
+        popped, floating = self.board.pop_from(landing) or ([], [])
+        for _, popped_color in popped + floating:
+            self.score += COLOR_POINTS.get(popped_color, 0)
+
+        self._check_lost()
+        return landing, popped, floating
+
+    def update(self, dt: float) -> None:
+        if self.over:
+            return
+
+        self.time += dt
+        amount = self._descent.update(dt)
+        if amount != 0:
+            self.board.move_down(amount)
+            self._check_lost()
+
+    def _check_lost(self) -> None:
+        if self.board.reaches(self.layout.floor_y, BUBBLE_SPRITE_HALF_HEIGHT):
+            self._lost = True
+
+    def _pick_color(self) -> BubbleColor | None:
+        return pick_color(self.board.present_colors(), self._rng)
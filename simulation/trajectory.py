@@ -0,0 +1,116 @@
+from math import inf, sqrt
+from simulation.board import Board
+from objects.arena.hexcoord import HexCoord
+import utils.settings as settings
+
+class TrajectorySolver:
+    # a bubble going up always reaches the ceiling, this only guards against degenerate directions
+    MAX_BOUNCES = 100
+
+    def __init__(self, board: Board, wall_xs: list[float], ceiling_y: float, radius: float = settings.BUBBLE_RADIUS) -> None:
+        self._board = board
+        self._wall_xs = wall_xs
+        # the ceiling moves down with the board
+        self._ceiling_offset = ceiling_y - board.top_left[1]
+        self._radius = radius
+
+    @property
+    def ceiling_y(self) -> float:
+        return self._board.top_left[1] + self._ceiling_offset
+
+    def predict_landing(self, start: tuple[float, float], direction: tuple[float, float]) -> tuple[HexCoord | None, list[tuple[float, float]]]:
+        x, y = start
+        path = [(x, y)]
+
+        dx, dy = direction
+        length = sqrt(dx * dx + dy * dy)
+        if length == 0:
+            return None, path
+        dx, dy = dx / length, dy / length
+
+        left, right = self._side_bounds(x)
+        ceiling_y = self.ceiling_y + self._radius
+
+        for _ in range(self.MAX_BOUNCES + 1):
+            length, bounce = self._segment_length(x, y, dx, dy, left, right, ceiling_y)
+            if length == inf:
+                return None, path
+
+            # first grid bubble touched before the end of the segment
+            hit = self._first_grid_hit(x, y, dx, dy, length)
+            if hit is not None:
+                contact = (x + dx * hit, y + dy * hit)
+                path.append(contact)
+                return self._board.pixel_to_hex(contact), path
+
+            x, y = x + dx * length, y + dy * length
+            path.append((x, y))
+
+            # ceiling reached
+            if not bounce:
+                return self._board.pixel_to_hex((x, y)), path
+
+            dx = -dx
+
+        return None, path
+
+    def _side_bounds(self, x: float) -> tuple[float, float]:
+        # the bubble bounces when its center gets within its radius of a wall
+        left, right = -inf, inf
+        for wall_x in self._wall_xs:
+            if wall_x < x:
+                left = max(left, wall_x + self._radius)
+            else:
+                right = min(right, wall_x - self._radius)
+        return left, right
+
+    def _segment_length(self, x: float, y: float, dx: float, dy: float,
+                        left: float, right: float, ceiling_y: float) -> tuple[float, bool]:
+        # distance to the next wall (bounce) or to the ceiling (no bounce)
+        to_ceiling = max(0, (ceiling_y - y) / dy) if dy < 0 else inf
+
+        to_wall = inf
+        if dx < 0:
+            to_wall = max(0, (left - x) / dx)
+        elif dx > 0:
+            to_wall = max(0, (right - x) / dx)
+
+        return (to_wall, True) if to_wall < to_ceiling else (to_ceiling, False)
+
+    def _first_grid_hit(self, x: float, y: float, dx: float, dy: float, length: float) -> float | None:
+        # march along the segment one cell at a time, testing only the bubbles around each sample.
+        # a bubble touched at distance t is always found at the sample closest to t, so the search
+        # can stop as soon as the best hit is before the middle of the next step
+        step = min(self._board.playable_scale)
+        radius = self._radius + settings.BUBBLE_RADIUS
+        reach = radius + step + 1
+
+        best = None
+        sample = 0.0
+        while sample <= length + step:
+            for cell in self._board.cells_near((x + dx * sample, y + dy * sample), reach):
+                t = self._ray_circle(x, y, dx, dy, self._board.cell_center(cell), radius)
+                if t is not None and t <= length and (best is None or t < best):
+                    best = t
+
+            if best is not None and best <= sample + step / 2:
+                break
+            sample += step
+
+        return best
+
+    @staticmethod
+    def _ray_circle(x: float, y: float, dx: float, dy: float,
+                    center: tuple[float, float], radius: float) -> float | None:
+        # distance along the (normalized) direction where the ray enters the circle
+        offset_x, offset_y = x - center[0], y - center[1]
+        b = offset_x * dx + offset_y * dy
+        c = offset_x * offset_x + offset_y * offset_y - radius * radius
+        if c <= 0:
+            return 0.0
+
+        discriminant = b * b - c
+        if b > 0 or discriminant < 0:
+            return None
+
+        return -b - sqrt(discriminant)
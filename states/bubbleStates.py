@@ -12,9 +12,16 @@ class Shot(State):
         object.physics.update(dt)
         object.rect.center = (int(object.physics.position.x),int(object.physics.position.y))
 
+# the states without data of their own are shared by every bubble
+IDLE = Idle()
+SHOT = Shot()
+
 class Floating(State):
     def __init__(self, duration,on_finish):
         super().__init__("floating")
+        self.reset(duration,on_finish)
+
+    def reset(self, duration,on_finish):
         self._time_floating = 0.0
         self.duration = duration
         self.on_finish = on_finish
@@ -25,24 +32,27 @@ class Floating(State):
 
         self._time_floating += dt
 
-        if self._time_floating >= self.duration:
+        # ends on the update closest to the duration (the sum of the dt isn't exact)
+        if self._time_floating >= self.duration - dt / 2:
             self.on_finish()
 
 class Pop(State):
-    def __init__(self, animation_sprites,total_frames,frames_per_image,scale,on_finish):
+    # the images are shown for the same time each, the whole animation lasts duration seconds
+    def __init__(self, animation_sprites,duration,on_finish):
         super().__init__("pop")
+        self.reset(animation_sprites,duration,on_finish)
+
+    def reset(self, animation_sprites,duration,on_finish):
         self.sprites = animation_sprites
-        self._current_frame = 0
-        self.frames_per_image = frames_per_image
-        self.total_frames = total_frames
-        self.scale = scale
+        self._time = 0.0
+        self.duration = duration
         self.on_finish = on_finish
 
     def update(self, object, dt):
-        image = self.sprites[(self._current_frame // self.frames_per_image) % len(self.sprites)]
-        object.set_image(image)
+        index = int(self._time / self.duration * len(self.sprites))
+        object.set_image(self.sprites[min(index,len(self.sprites) - 1)])
 
-        self._current_frame += 1
+        self._time += dt
 
-        if self._current_frame >= self.total_frames:
+        if self._time >= self.duration - dt / 2:
             self.on_finish()
\ No newline at end of file
@@ -3,7 +3,7 @@ import states.game.start_menu_state as sms
 import utils.settings as settings
 
 class GameOverMenuState(MenuState):
-    def __init__(self, score: int, level: int, win: bool) -> None:
+    def __init__(self, score: int, level: int, win: bool, level_pack: str = None, endless: bool = False) -> None:
         caption = settings.GAME_OVER_MENU_CAPTION
         options = {
             settings.PLAY_AGAIN_OPTION: self._on_play_again,
@@ -18,12 +18,14 @@ class GameOverMenuState(MenuState):
 
         super().__init__(caption, options, information)
         self._level = level
+        self._level_pack = level_pack
+        self._endless = endless
 
     def _on_play_again(self):
-        self._next_state = sms.PlayState(self._level)
+        self._next_state = sms.PlayState(self._level, self._level_pack, endless=self._endless)
     
     def _on_start_menu(self):
-        self._next_state = sms.StartMenuState()
+        self._next_state = sms.StartMenuState(level_pack=self._level_pack, endless=self._endless)
     
     def _on_exit(self):
         self._next_state = None
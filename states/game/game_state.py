@@ -10,7 +10,8 @@ class GameState(ABC):
         pass
 
     @abstractmethod
-    def draw(self) -> None:
+    def draw(self, alpha: float = 1) -> None:
+        # alpha: how far the frame is between the previous update and the last one (0 to 1)
         pass
 
     @abstractmethod
@@ -2,6 +2,8 @@ from states.game.game_state import GameState
 from inputs.inputHandler import InputHandler
 from inputs.menu.option_navigation import Next, Previous, Select
 import utils.settings as settings
+import utils.profiler as profiler
+from utils.text_cache import text_cache
 
 import pygame
 from typing import Callable
@@ -17,8 +19,8 @@ class MenuState(GameState):
 
         pygame.display.set_caption(caption)
         self._display = pygame.display.set_mode(settings.MENU_WINDOW_SIZE)
-        self._information_font = pygame.font.Font(None, settings.INFORMATION_FONT_SIZE)
-        self._option_font = pygame.font.Font(None, settings.OPTION_FONT_SIZE)
+        self._information_font = text_cache.font(None, settings.INFORMATION_FONT_SIZE)
+        self._option_font = text_cache.font(None, settings.OPTION_FONT_SIZE)
         self._calculate_layout()
 
 
@@ -67,14 +69,14 @@ class MenuState(GameState):
         self._options_start_y = height / 2 - self._options_total_height / 2 if len(self._information) == 0 \
             else height / 2 + (height / 2 - self._options_total_height) / 2
 
-    def draw(self) -> None:
+    def draw(self, alpha: float = 1) -> None:
         self._display.fill(settings.BG_COLOR)
 
         for i, text in enumerate(self._information):
             x = self._information_x
             y = self._information_start_y + i * settings.INFORMATION_SPACING
 
-            text_surface = self._information_font.render(text, True, settings.INFORMATION_COLOR)
+            text_surface = text_cache.render(self._information_font, text, True, settings.INFORMATION_COLOR)
             text_rect = text_surface.get_rect(center=(x, y))
 
             self._display.blit(text_surface, text_rect)
@@ -84,11 +86,14 @@ class MenuState(GameState):
             y = self._options_start_y + i * settings.OPTION_SPACING
 
             color = settings.OPTION_SELECTED_COLOR if i == self._selected_option else settings.OPTION_COLOR
-            text_surface = self._option_font.render(option, True, color)
+            text_surface = text_cache.render(self._option_font, option, True, color)
             text_rect = text_surface.get_rect(center=(x, y))
 
             self._display.blit(text_surface, text_rect)
 
+        if profiler.overlay is not None:
+            self._display.blit(profiler.overlay.image, profiler.overlay.rect)
+
         pygame.display.flip()
 
     def next_state(self) -> GameState:
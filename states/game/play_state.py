@@ -1,29 +1,45 @@
 import pygame
+import random
 from os.path import join
 
 from levels.level_loader import LevelLoader
 from objects.arena.arena import Arena
+from objects.arena.hex_grid import HexGrid
+from objects.arena.events import BubblesAnimating, BubblesPopped, LevelLost, LevelWon
 from objects.score import Score
 from objects.bubbleShooter import BubbleShooter
 from objects.colors import bubble_sprites, BubbleColor
-from utils.spritesheet import SpriteSheet
+from utils.assets import assets
+from utils.dirty_renderer import DirtyRenderer
+from utils.text_cache import text_cache
+from utils.replay import Replay, grid_hash
 from maps.metal_map import MetalMap
+from simulation.layout import METAL_LAYOUT
+from simulation.row_generators import row_generator
 import utils.settings as settings
+import utils.profiler as profiler
 from states.game.game_state import GameState
 import states.game.game_over_menu_state as goms
 
 class PlayState(GameState):
-    def __init__(self, level: int) -> None:
+    def __init__(self, level: int, level_pack: str = None, seed: int = None, endless: bool = False) -> None:
         pygame.display.set_caption(settings.GAME_CAPTION)
 
-        self._map = MetalMap()
+        # the game only depends on its seed and on the key events, which are kept to play it again (see replay())
+        self.seed = seed if seed is not None else random.randrange(2 ** 32)
+        self._rng = random.Random(self.seed)
+        self._replay = Replay(self.seed, level, level_pack, step=None, endless=endless)
+        # endless mode: a single arena that gets new rows as it goes down instead of levels
+        self._endless = endless
+
+        # the video mode is needed before loading the images (they are converted to its pixel format)
+        self.WIDTH, self.HEIGHT = map(int,METAL_LAYOUT.bg_size)
+        self._display = pygame.display.set_mode((self.WIDTH,self.HEIGHT))
+
+        self._map = MetalMap(METAL_LAYOUT)
         bg = pygame.sprite.Sprite()
         bg.image = self._map.bg_image
         bg.rect = bg.image.get_rect()
-
-        self.WIDTH =  bg.rect.width
-        self.HEIGHT = bg.rect.height
-        self._display = pygame.display.set_mode((self.WIDTH,self.HEIGHT))
         self.GAME_EVENT = pygame.event.custom_type()
 
         self._running = True
@@ -33,15 +49,21 @@ class PlayState(GameState):
         self._next_level = False
         self._bubbles_during_animation = 0
 
-        self.scoreFont = pygame.font.SysFont(settings.SCORE_TEXT_FONT_NAME, settings.SCORE_TEXT_FONT_SIZE)
+        self.scoreFont = text_cache.font(settings.SCORE_TEXT_FONT_NAME, settings.SCORE_TEXT_FONT_SIZE)
 
         self._load_bubbles()
 
-        self._bg_group = pygame.sprite.Group()
-        self._bg_group.add(bg)
+        # static background (fill color + map image), used to erase the regions that changed
+        self._background = pygame.Surface(self._display.get_size()).convert()
+        self._background.fill(settings.BG_COLOR)
+        self._background.blit(bg.image,bg.rect)
+        self._renderer = DirtyRenderer(self._display,self._background)
+
+        self._score_sprite = pygame.sprite.Sprite()
 
         self._score = Score()
 
+        self._level_pack = level_pack
         self._create_base_map(level)
         self._load_current_arena()
 
@@ -56,6 +78,10 @@ class PlayState(GameState):
     def win(self) -> bool:
         return self._win
     
+    @property
+    def bubble_shooter(self) -> BubbleShooter:
+        return self._bubbleShooter
+
     @property
     def level(self) -> int:
         current = self._level_loader.current_level_index
@@ -66,19 +92,28 @@ class PlayState(GameState):
     def handle_input(self, events) -> None:
         for event in events:
             if event.type == pygame.KEYDOWN:
+                self._replay.events.append((self._replay.ticks, Replay.KEY_DOWN, event.key))
                 self._keysdown.add(event.key)
                 self._bubbleShooter.input_handler.input_start(event.key)
             elif event.type == pygame.KEYUP:
                 #could had a on_stop event for when the player stops pressing the key
+                self._replay.events.append((self._replay.ticks, Replay.KEY_UP, event.key))
                 if event.key in self._keysdown:
                     self._keysdown.remove(event.key)
+            elif event.type == pygame.VIDEOEXPOSE:
+                # the window contents may have been lost
+                self._renderer.invalidate()
             elif event.type == self.GAME_EVENT:
                 print(event.txt)
-        
+
+    def update(self, dt: float) -> None:
+        self._replay.step = dt
+        self._replay.ticks += 1
+
+        # held keys act once per update (e.g. the shooter rotation), so they don't depend on the frame rate
         for key in self._keysdown:
             self._bubbleShooter.input_handler.input_triggered(key)
 
-    def update(self, dt: float) -> None:
         self._bubbleShooter.update(dt=dt)
         if self.arena is not None:
             self.arena.update(dt=dt)
@@ -92,34 +127,48 @@ class PlayState(GameState):
             self._win = False
             self._running = False
 
-    def draw(self) -> None:
-        self._display.fill(settings.BG_COLOR)
-
-        self._bg_group.draw(self._display)
-
+    def draw(self, alpha: float = 1) -> None:
+        # only the regions that changed since the last frame are redrawn and sent to the screen
+        layers = []
+        offsets = {}
         if self.arena is not None:
-            floor = self.arena.get_floor()
-            self._display.blit(floor.image,floor.rect)
-
-            ceiling = self.arena.get_ceiling()
-            self._display.blit(ceiling.image,ceiling.rect)
+            layers.append((self.arena.get_floor(),self.arena.get_ceiling()))
 
-        self._bubbleShooter.draw(self._display)
+        layers.append(self._bubbleShooter)
 
         if self.arena is not None:
-            self.arena.get_grid().draw(self._display)
-            self.arena.get_dynamic_bubbles().draw(self._display)
+            # the grid bubbles are in grid coordinates, moved to the screen by the offset of the grid
+            offsets[len(layers)] = self.arena.get_grid().draw_offset
+            layers.append(self.arena.get_visible_grid_bubbles())
+            layers.append(self.arena.get_dynamic_bubbles())
+
+        # the same surface is returned while the score doesn't change, so the renderer sees no change
+        self._score_sprite.image = text_cache.render(self.scoreFont,f"Score: {self._score.score}",False,settings.SCORE_TEXT_COLOR,settings.SCORE_TEXT_BG_COLOR)
+        self._score_sprite.rect = self._score_sprite.image.get_rect(topleft=settings.SCORE_SCREEN_POSITION)
+        layers.append((self._score_sprite,))
+        if profiler.overlay is not None:
+            layers.append((profiler.overlay,))
+
+        # moving bubbles are drawn between their last two positions, the rest moves too slowly to matter
+        moved = []
+        if self.arena is not None:
+            for bubble in self.arena.get_dynamic_bubbles():
+                position = bubble.interpolated_position(alpha)
+                if position != bubble.rect.center:
+                    moved.append((bubble,bubble.rect.center))
+                    bubble.rect.center = position
 
-        score_surface = self.scoreFont.render(f"Score: {self._score.score}",False,settings.SCORE_TEXT_COLOR,settings.SCORE_TEXT_BG_COLOR)
-        self._display.blit(score_surface,settings.SCORE_SCREEN_POSITION)
+        self._renderer.render(layers,offsets)
 
-        pygame.display.flip()
+        for bubble, center in moved:
+            bubble.rect.center = center
 
 
     def _create_base_map(self, level: int) -> None:
         self._level_loader = LevelLoader(
             *self._map.grid_size, self._map.grid_topleft,
-            initial_level_index=level - 1
+            initial_level_index=level - 1,
+            level_path=self._level_pack
         )
         self.arena = None
         self._bubbleShooter = BubbleShooter(self._map.shooter_position,join("sprites","shooter.png"),join("sprites","arrow.png"))
@@ -127,24 +176,24 @@ class PlayState(GameState):
 
     def _register_handlers(self) -> None:
         if self.arena is not None:
-            self.arena.register_win_handler(self.on_win)
-            self.arena.register_lose_handler(self.on_lose)
-            self.arena.register_bubble_start_animation_handler(self._handle_bubble_start_animation)
-            self.arena.register_bubble_pop_handler(self.handle_bubble_pop)
-            self.arena.register_bubble_pop_handler(self._score.handle_bubble_pop)
+            self.arena.events.subscribe(LevelWon,self.on_win)
+            self.arena.events.subscribe(LevelLost,self.on_lose)
+            self.arena.events.subscribe(BubblesAnimating,self._handle_bubbles_animating)
+            self.arena.events.subscribe(BubblesPopped,self.handle_bubbles_popped)
+            self.arena.events.subscribe(BubblesPopped,self._score.handle_bubbles_popped)
             self._bubbleShooter.register_on_shoot_event(self.arena.shooter_shoot_handler)
     
     def _unregister_important_handlers(self) -> None:
         if self.arena is not None:
             self._bubbleShooter.unregister_on_shoot_event(self.arena.shooter_shoot_handler)
-            self.arena.unregister_win_handler(self.on_win)
-            self.arena.unregister_lose_handler(self.on_lose)
+            self.arena.events.unsubscribe(LevelWon,self.on_win)
+            self.arena.events.unsubscribe(LevelLost,self.on_lose)
 
     def _unregister_animation_handlers(self) -> None:
         if self.arena is not None:
-            self.arena.unregister_bubble_start_animation_handler(self._handle_bubble_start_animation)
-            self.arena.unregister_bubble_pop_handler(self.handle_bubble_pop)
-            self.arena.unregister_bubble_pop_handler(self._score.handle_bubble_pop)
+            self.arena.events.unsubscribe(BubblesAnimating,self._handle_bubbles_animating)
+            self.arena.events.unsubscribe(BubblesPopped,self.handle_bubbles_popped)
+            self.arena.events.unsubscribe(BubblesPopped,self._score.handle_bubbles_popped)
     
 
     def _load_current_arena(self) -> None:
@@ -152,6 +201,13 @@ class PlayState(GameState):
         self._unregister_important_handlers()
         self._unregister_animation_handlers()
 
+        # endless mode: an empty grid, the arena fills it
+        if self._endless:
+            grid = HexGrid(*settings.ENDLESS_GRID_SIZE, *self._map.grid_size, self._map.grid_topleft)
+            self.arena = Arena(self._bubbleShooter.position.copy(), self._map,grid,self._rng,row_generator(self._rng))
+            self._register_handlers()
+            return
+
         # load current grid
         grid = self._level_loader.load_current_level()
 
@@ -162,35 +218,45 @@ class PlayState(GameState):
             return
 
         # create new arena
-        self.arena = Arena(self._bubbleShooter.position.copy(), self._map,grid)
+        self.arena = Arena(self._bubbleShooter.position.copy(), self._map,grid,self._rng)
         self._register_handlers()
 
-    def on_lose(self) -> None:
+        # the next level is ready by the time this one is won
+        self._level_loader.prefetch_next_level()
+
+    def replay(self) -> Replay:
+        # the game so far, with its current score and grid
+        self._replay.score = self._score.score
+        self._replay.grid_hash = grid_hash(self.arena.get_grid().board if self.arena is not None else None)
+        return self._replay
+
+    def on_lose(self,_: LevelLost) -> None:
         self._lose_level = True
 
-    def on_win(self) -> None:
+    def on_win(self,_: LevelWon) -> None:
         self._unregister_important_handlers()
         self._next_level = True
 
-    def _handle_bubble_start_animation(self,_) -> None:
-        self._bubbles_during_animation += 1
+    def _handle_bubbles_animating(self,event: BubblesAnimating) -> None:
+        self._bubbles_during_animation += len(event.bubbles)
     
-    def handle_bubble_pop(self,_) -> None:
-        self._bubbles_during_animation -= 1
+    def handle_bubbles_popped(self,event: BubblesPopped) -> None:
+        self._bubbles_during_animation -= len(event.bubbles)
 
     
     def _load_bubbles(self):
         bubbles = join("sprites","bubbles.png")
-        sheet = SpriteSheet(bubbles)
 
         COLORS = [BubbleColor.BLUE,BubbleColor.RED,BubbleColor.PURPLE,BubbleColor.BLACK,
                   BubbleColor.YELLOW,BubbleColor.GREEN,BubbleColor.ORANGE,BubbleColor.GRAY]
-        CELL_SIZE = 32
+        CELL_SIZE = settings.BUBBLE_SPRITE_SIZE
+        FRAMES = 7
+        # 7 sprites per color (the first is the bubble itself, the others are the pop animation)
+        rects = [(col * CELL_SIZE,row * CELL_SIZE,CELL_SIZE,CELL_SIZE) for row in range(len(COLORS)) for col in range(0,FRAMES)]
+        # scaled once (and loaded once per process), every bubble shares these frames
+        sprites = assets.sprite_sheet(bubbles,rects,-1,settings.GAME_SCALE)
         for row,color in enumerate(COLORS):
-            # 7 sprites per color (the first is the bubble itself, the others are the pop animation)
-            rects = [(col * CELL_SIZE,row * CELL_SIZE,CELL_SIZE,CELL_SIZE) for col in range(0,7)]
-            sprites = sheet.images_at(rects,-1)
-            bubble_sprites[color] = sprites
+            bubble_sprites[color] = sprites[row * FRAMES:(row + 1) * FRAMES]
 
     def next_state(self) -> GameState:
-        return self if self._running else goms.GameOverMenuState(self._score.score, self.level, self._win)
+        return self if self._running else goms.GameOverMenuState(self._score.score, self.level, self._win, self._level_pack, self._endless)
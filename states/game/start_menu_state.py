@@ -3,7 +3,7 @@ from states.game.play_state import PlayState
 import utils.settings as settings
 
 class StartMenuState(MenuState):
-    def __init__(self, level: int = 1) -> None:
+    def __init__(self, level: int = 1, level_pack: str = None, endless: bool = False) -> None:
         caption = settings.START_MENU_CAPTION
         options = {
             settings.PLAY_OPTION: self._on_play,
@@ -12,9 +12,11 @@ class StartMenuState(MenuState):
 
         super().__init__(caption, options)
         self._initial_level = level
+        self._level_pack = level_pack
+        self._endless = endless
 
     def _on_play(self):
-        self._next_state = PlayState(self._initial_level)
+        self._next_state = PlayState(self._initial_level, self._level_pack, endless=self._endless)
 
     def _on_exit(self):
         self._next_state = None
@@ -0,0 +1,105 @@
+# Compares the board backends (simulation/backends.py) on the same random boards and shots:
+# the matches (pop_from), the full floating check, the present colors and the flood fill of a color.
+# The results of every backend are also compared with the first one, so a faster backend can't be a wrong one.
+#
+# Usage (from the repository root): python -m tools.bench_board [--boards N] [--seed S] [--size W H]
+
+import random
+import time
+from argparse import ArgumentParser, Namespace
+
+from objects.arena.hexcoord import HexCoord
+from objects.colors import BubbleColor, color_to_code
+from simulation.backends import BOARD_BACKENDS
+from simulation.board import Board
+
+
+def random_level(rng: random.Random, width: int, height: int) -> list[tuple[HexCoord, BubbleColor]]:
+    # top two thirds filled, like the levels of the game
+    colors = rng.sample(list(BubbleColor), 4)
+    return [
+        (HexCoord(row, col), rng.choice(colors))
+        for row in range(height * 2 // 3)
+        for col in range(row % 2, width, 2)
+        if rng.random() < 0.9
+    ]
+
+
+def random_shots(rng: random.Random, width: int, height: int, count: int) -> list[tuple[HexCoord, BubbleColor]]:
+    return [
+        (HexCoord(row, col), rng.choice(list(BubbleColor)))
+        for row, col in ((rng.randrange(height), rng.randrange(width)) for _ in range(count * 2))
+        if (row + col) % 2 == 0
+    ][:count]
+
+
+def run(board_class: type[Board], levels: list, shots: list, width: int, height: int) -> tuple[dict[str, float], list]:
+    timings = {"pop_from": 0.0, "floating_cells": 0.0, "present_colors": 0.0, "flood_fill": 0.0}
+    results = []
+
+    for level, level_shots in zip(levels, shots):
+        board = board_class(width, height)
+        for coord, color in level:
+            board.add(coord, color)
+
+        for coord, color in level_shots:
+            start = time.perf_counter()
+            colors = board.present_colors()
+            timings["present_colors"] += time.perf_counter() - start
+
+            start = time.perf_counter()
+            filled = board.flood_fill(range(width), color_to_code[color])
+            timings["flood_fill"] += time.perf_counter() - start
+
+            start = time.perf_counter()
+            floating = board.floating_cells()
+            timings["floating_cells"] += time.perf_counter() - start
+
+            if board.add(coord, color) is None:
+                continue
+            start = time.perf_counter()
+            popped = board.pop_from(coord)
+            timings["pop_from"] += time.perf_counter() - start
+
+            # order independent, to compare the backends
+            results.append((
+                colors, set(filled), set(floating),
+                None if popped is None else (set(popped[0]), set(popped[1]))
+            ))
+
+    return timings, results
+
+
+def parse_args() -> Namespace:
+    argparser = ArgumentParser()
+    argparser.add_argument("-b", "--boards", type=int, default=200, help="Number of random boards")
+    argparser.add_argument("-n", "--shots", type=int, default=50, help="Number of shots on each board")
+    argparser.add_argument("-s", "--seed", type=int, default=0, help="Seed of the random boards")
+    argparser.add_argument("--size", type=int, nargs=2, default=(15, 20), metavar=("W", "H"), help="Board size")
+    return argparser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    width, height = args.size
+
+    rng = random.Random(args.seed)
+    levels = [random_level(rng, width, height) for _ in range(args.boards)]
+    shots = [random_shots(rng, width, height, args.shots) for _ in range(args.boards)]
+
+    reference_name, reference_timings, reference_results = None, None, None
+    mismatches = 0
+    for name, board_class in BOARD_BACKENDS.items():
+        timings, results = run(board_class, levels, shots, width, height)
+        if reference_results is None:
+            reference_name, reference_timings, reference_results = name, timings, results
+        elif results != reference_results:
+            mismatches += 1
+            print(f"{name}: results differ from {reference_name}")
+
+        print(f"{name}:")
+        for operation, seconds in timings.items():
+            speedup = reference_timings[operation] / seconds if seconds > 0 else float("inf")
+            print(f"    {operation:<16}{seconds * 1000:>10.2f} ms    x{speedup:.2f}")
+
+    raise SystemExit(1 if mismatches else 0)
@@ -0,0 +1,329 @@
+# Benchmark suite of the hot paths of the game, with results that can be compared between runs.
+#
+# micro: the grid operations (HexGrid.add_bubble, _pop_bubbles_from, _get_floating_bubbles, _pixel_to_hex,
+#   get_present_colors) and LevelLoader.load_level, on random levels of each size (15x20 up to 300x300).
+#   Each benchmark is run for a few rounds and keeps the best time per call, the least noisy one.
+# macro: a scripted game (a player that aims every shot at a group of its color, with a fixed seed) played
+#   from every shipped level with the SDL dummy video driver, updates and drawing included (best of a few
+#   rounds too). The aiming itself isn't timed.
+#
+# The results are written as JSON (--output). With --baseline, they are compared with a previous output
+# (the stored one, tools/benchmark_baseline.json, when no file is given): a scripted game that ends with another
+# score or grid is a regression (exit code 1). The times depend on the machine, they are only compared with
+# --timings (with a baseline from the same machine): a benchmark slower by more than the tolerance is a regression.
+#
+# Usage (from the repository root):
+#   python -m tools.benchmark --output results.json [--baseline [baseline.json]] [--timings] [--tolerance 0.2]
+#   python -m tools.benchmark --output tools/benchmark_baseline.json   (refreshes the stored baseline)
+
+import os
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+import json
+import platform
+import random
+import tempfile
+import time
+from argparse import ArgumentParser, Namespace
+from os import path
+
+import pygame
+
+from levels.level_loader import LevelLoader
+from objects.arena.hex_grid import HexGrid
+from objects.arena.hexcoord import HexCoord
+from objects.bubble import Bubble
+from objects.colors import BubbleColor
+from physics.staticPhysics import StaticPhysics
+from simulation.layout import METAL_LAYOUT
+# the states import each other, the start menu (like in main.py) imports them in an order that works
+import states.game.start_menu_state
+from states.game.play_state import PlayState
+from tools.bench_board import random_level
+import utils.settings as settings
+
+FORMAT_VERSION = 1
+DEFAULT_SIZES = [(15, 20), (50, 50), (100, 100), (300, 300)]
+# scripted game: a shot at most every SHOT_TICKS updates, each one after turning the shooter to its aim
+SHOT_TICKS = 40
+MACRO_SEED = 0
+BASELINE_FILE = path.join(path.dirname(path.abspath(__file__)), "benchmark_baseline.json")
+
+
+def grid_size(width: int, height: int) -> tuple[float, float]:
+    # the cells keep the size they have in the game (a 15x20 grid fills the arena)
+    return METAL_LAYOUT.grid_size[0] * width / 15, METAL_LAYOUT.grid_size[1] * height / 20
+
+
+def create_grid(level: list[tuple[HexCoord, object]], width: int, height: int) -> HexGrid:
+    grid = HexGrid(width, height, *grid_size(width, height), METAL_LAYOUT.grid_topleft)
+    for coord, color in level:
+        grid.add_bubble(create_bubble(grid, coord, color), coord)
+    return grid
+
+
+def create_bubble(grid: HexGrid, coord: HexCoord, color) -> Bubble:
+    return Bubble(StaticPhysics(grid.hex_to_pixel(coord)), color)
+
+
+def best_time(rounds: int, calls: int, run_round) -> float:
+    # best seconds per call; run_round(calls) runs the calls and returns the time spent in them
+    return min(run_round(calls) for _ in range(rounds)) / calls
+
+
+def micro_benchmarks(width: int, height: int, seed: int, rounds: int, calls: int, level_directory: str) -> dict[str, float]:
+    rng = random.Random(f"{seed}-{width}x{height}")
+    level = random_level(rng, width, height)
+    results = {}
+
+    def add_bubble(calls: int) -> float:
+        grid = create_grid([], width, height)
+        shots = rng.sample(level, calls)
+        bubbles = [(coord, create_bubble(grid, coord, color)) for coord, color in shots]
+        start = time.perf_counter()
+        for coord, bubble in bubbles:
+            grid.add_bubble(bubble, coord)
+        return time.perf_counter() - start
+
+    def pop_bubbles_from(calls: int) -> float:
+        # pops (or tries to pop) random bubbles, the grid is created again when there are few left
+        elapsed = 0.0
+        grid = create_grid(level, width, height)
+        for _ in range(calls):
+            if len(grid) < len(level) // 4:
+                grid = create_grid(level, width, height)
+            coord = grid.get_bubble_coord(rng.choice(grid.sprites()))
+            start = time.perf_counter()
+            grid._pop_bubbles_from(coord)
+            elapsed += time.perf_counter() - start
+        return elapsed
+
+    full_grid = create_grid(level, width, height)
+    # like a shot bubble: close to an empty cell (less than half a cell away)
+    empty_coords = [
+        HexCoord(row, col) for row in range(height) for col in range(row % 2, width, 2)
+        if full_grid.is_valid_coord(HexCoord(row, col))
+    ]
+    cell_width, cell_height = full_grid.board.scale
+    positions = []
+    for coord in (rng.choice(empty_coords) for _ in range(calls)):
+        x, y = full_grid.hex_to_pixel(coord)
+        positions.append((x + rng.uniform(-cell_width / 2, cell_width / 2), y + rng.uniform(-cell_height / 4, cell_height / 4)))
+
+    def get_floating_bubbles(calls: int) -> float:
+        start = time.perf_counter()
+        for _ in range(calls):
+            full_grid._get_floating_bubbles()
+        return time.perf_counter() - start
+
+    def pixel_to_hex(calls: int) -> float:
+        start = time.perf_counter()
+        for position in positions[:calls]:
+            full_grid._pixel_to_hex(position)
+        return time.perf_counter() - start
+
+    def get_present_colors(calls: int) -> float:
+        start = time.perf_counter()
+        for _ in range(calls):
+            full_grid.get_present_colors()
+        return time.perf_counter() - start
+
+    level_file = write_level(level_directory, level, width, height)
+    def load_level(calls: int) -> float:
+        start = time.perf_counter()
+        for _ in range(calls):
+            LevelLoader.load_level(level_file, *grid_size(width, height), METAL_LAYOUT.grid_topleft)
+        return time.perf_counter() - start
+
+    # the slow operations on the big grids get fewer calls
+    cells = width * height
+    few_calls = max(1, calls * 300 // cells)
+    results["add_bubble"] = best_time(rounds, min(calls, len(level)), add_bubble)
+    results["_pop_bubbles_from"] = best_time(rounds, few_calls, pop_bubbles_from)
+    results["_get_floating_bubbles"] = best_time(rounds, few_calls, get_floating_bubbles)
+    results["_pixel_to_hex"] = best_time(rounds, calls, pixel_to_hex)
+    results["get_present_colors"] = best_time(rounds, few_calls, get_present_colors)
+    results["load_level"] = best_time(rounds, max(1, few_calls // 10), load_level)
+    return results
+
+
+def write_level(directory: str, level: list[tuple[HexCoord, object]], width: int, height: int) -> str:
+    bubbles: dict[str, list[list[int]]] = {}
+    for coord, color in level:
+        bubbles.setdefault(color.name, []).append([coord.row, coord.col])
+
+    level_file = path.join(directory, f"lvl_{width}x{height}.json")
+    with open(level_file, "w") as f:
+        json.dump({"width": width, "height": height, "bubbles": bubbles}, f)
+    return level_file
+
+
+class ScriptedPlayer:
+    # plays with key events like a person: picks the angle whose predicted landing touches the biggest group
+    # of the color of its bubble, holds an arrow key until the shooter points there, then shoots
+    def __init__(self) -> None:
+        self._next_shot = 0
+        self._target: float | None = None
+        self._key: int | None = None
+
+    def events(self, state: PlayState, tick: int) -> list[pygame.event.Event]:
+        if state.arena is None or tick < self._next_shot:
+            return []
+
+        events = []
+        angle = state.bubble_shooter.angle
+        if self._target is None:
+            self._target = self._aim(state)
+            if abs(angle - self._target) >= 0.5:
+                self._key = pygame.K_LEFT if self._target < angle else pygame.K_RIGHT
+                events.append(pygame.event.Event(pygame.KEYDOWN, key=self._key))
+                return events
+
+        if abs(angle - self._target) < 0.5:
+            if self._key is not None:
+                events.append(pygame.event.Event(pygame.KEYUP, key=self._key))
+                self._key = None
+            events.append(pygame.event.Event(pygame.KEYDOWN, key=pygame.K_SPACE))
+            events.append(pygame.event.Event(pygame.KEYUP, key=pygame.K_SPACE))
+            self._target = None
+            self._next_shot = tick + SHOT_TICKS
+        return events
+
+    @staticmethod
+    def _aim(state: PlayState) -> float:
+        arena = state.arena
+        board = arena.get_grid().board
+        color = arena.get_shooter_bubble().color
+
+        best_angle, best_group = 90, -1
+        for angle in range(settings.BUBBLE_SHOOTER_MINIMUM_ROTATION, settings.BUBBLE_SHOOTER_MAXIMUM_ROTATION + 1):
+            landing, _ = arena.predict_landing(pygame.Vector2(0, -1).rotate(angle - 90))
+            if landing is None:
+                continue
+
+            group = ScriptedPlayer._group_size(board, landing, color)
+            if group > best_group:
+                best_angle, best_group = angle, group
+        return best_angle
+
+    @staticmethod
+    def _group_size(board, landing: HexCoord, color: BubbleColor) -> int:
+        # bubbles of the color connected to the landing cell
+        cells = set()
+        for neighbor in landing.neighbors():
+            if board.in_bounds(neighbor) and board.color_at(board.cell_index(neighbor)) == color:
+                cells.update(board.connected_cells(neighbor, color))
+        return len(cells)
+
+
+def macro_benchmark(level: int, rounds: int, max_ticks: int, step: float) -> dict:
+    # the game is the same every round, only the best time is kept
+    results = [play_scripted_game(level, max_ticks, step) for _ in range(rounds)]
+    return min(results, key=lambda result: result["seconds"])
+
+
+def play_scripted_game(level: int, max_ticks: int, step: float) -> dict:
+    # one update and one draw per tick, until the game is over or max_ticks
+    state = PlayState(level, seed=MACRO_SEED)
+    player = ScriptedPlayer()
+    elapsed = 0.0
+    tick = 0
+    while tick < max_ticks and state.next_state() is state:
+        events = player.events(state, tick)
+        start = time.perf_counter()
+        state.handle_input(events)
+        state.update(step)
+        state.draw()
+        elapsed += time.perf_counter() - start
+        tick += 1
+
+    return {"seconds": elapsed, "ticks": tick, "score": state.replay().score, "grid_hash": state.replay().grid_hash}
+
+
+def compare(results: dict, baseline: dict, tolerance: float | None) -> list[str]:
+    # the times are only compared with a tolerance
+    regressions = []
+    for size, benchmarks in results["micro"].items() if tolerance is not None else ():
+        for name, seconds in benchmarks.items():
+            base = baseline.get("micro", {}).get(size, {}).get(name, None)
+            if base is not None and seconds > base * (1 + tolerance):
+                regressions.append(f"{name} {size}: {seconds * 1e6:.2f} us per call, baseline {base * 1e6:.2f} us (x{seconds / base:.2f})")
+
+    for level, result in results["macro"].items():
+        base = baseline.get("macro", {}).get(level, None)
+        if base is None:
+            continue
+        if (result["ticks"], result["score"], result["grid_hash"]) != (base["ticks"], base["score"], base["grid_hash"]):
+            regressions.append(f"level {level}: the scripted game ends differently from the baseline (score {result['score']}, baseline {base['score']})")
+        elif tolerance is not None and result["seconds"] > base["seconds"] * (1 + tolerance):
+            regressions.append(f"level {level}: {result['seconds']:.3f}s, baseline {base['seconds']:.3f}s (x{result['seconds'] / base['seconds']:.2f})")
+    return regressions
+
+
+def parse_args() -> Namespace:
+    argparser = ArgumentParser()
+    argparser.add_argument("--sizes", type=str, nargs="*", default=[f"{w}x{h}" for w, h in DEFAULT_SIZES], help="Grid sizes (WxH) of the micro benchmarks")
+    argparser.add_argument("-r", "--rounds", type=int, default=5, help="Rounds of each micro benchmark (the best one is kept)")
+    argparser.add_argument("-n", "--calls", type=int, default=200, help="Calls per round of the micro benchmarks")
+    argparser.add_argument("-s", "--seed", type=int, default=0, help="Seed of the random levels")
+    argparser.add_argument("-l", "--levels", type=int, nargs="*", default=None, help="Levels of the macro benchmarks (default: all)")
+    argparser.add_argument("--macro-rounds", type=int, default=3, help="Rounds of each macro benchmark (the best one is kept)")
+    argparser.add_argument("-t", "--max-ticks", type=int, default=1800, help="Updates of each scripted game at most")
+    argparser.add_argument("--skip-micro", action="store_true", help="Only run the macro benchmarks")
+    argparser.add_argument("--skip-macro", action="store_true", help="Only run the micro benchmarks")
+    argparser.add_argument("-o", "--output", type=str, default=None, help="JSON file to write the results to")
+    argparser.add_argument("-b", "--baseline", type=str, nargs="?", default=None, const=BASELINE_FILE,
+                           help="JSON results to compare with (default: the stored baseline)")
+    argparser.add_argument("--timings", action="store_true", help="Also compare the times with the baseline (from the same machine)")
+    argparser.add_argument("--tolerance", type=float, default=0.2, help="Slowdown allowed over the baseline with --timings (0.2 = 20%%)")
+    return argparser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    pygame.init()
+
+    # the game state also sets the video mode and loads the bubble sprites the grids need
+    levels = LevelLoader().levels
+    PlayState(1, seed=MACRO_SEED)
+
+    results = {
+        "version": FORMAT_VERSION,
+        "python": platform.python_version(),
+        "pygame": pygame.version.ver,
+        "micro": {},
+        "macro": {},
+    }
+
+    if not args.skip_micro:
+        with tempfile.TemporaryDirectory() as level_directory:
+            for size in args.sizes:
+                width, height = map(int, size.split("x"))
+                benchmarks = micro_benchmarks(width, height, args.seed, args.rounds, args.calls, level_directory)
+                results["micro"][size] = benchmarks
+                for name, seconds in benchmarks.items():
+                    print(f"{size:>8} {name:<24}{seconds * 1e6:>12.2f} us")
+
+    if not args.skip_macro:
+        for level in args.levels if args.levels else range(1, len(levels) + 1):
+            result = macro_benchmark(level, args.macro_rounds, args.max_ticks, 1 / 60)
+            results["macro"][str(level)] = result
+            print(f"level {level:>3}: {result['ticks']} updates in {result['seconds']:.3f}s, score {result['score']}")
+
+    if args.output is not None:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=4)
+
+    regressions = []
+    if args.baseline is not None:
+        with open(args.baseline, "r") as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.tolerance if args.timings else None)
+        for regression in regressions:
+            print(f"REGRESSION {regression}")
+        print(f"{len(regressions)} regressions over {args.baseline}")
+
+    pygame.quit()
+    raise SystemExit(1 if regressions else 0)
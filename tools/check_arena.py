@@ -0,0 +1,166 @@
+# Correctness checks of the arena in situations a normal game rarely reaches, played with the SDL dummy video
+# driver and key events, like a player:
+# - two shots fired in the same update, the second one's landing cell is taken by the first one when it lands
+# - shooting after the level is lost (while the last animations play)
+# - in endless mode, a shot that clears the grid while a second shot is still flying (the grid is filled again)
+#
+# Each check is played with every seed (the colors differ) and fails when a shot bubble is lost (neither in the
+# grid nor animating once it stopped), is inside a grid bubble while it flies, or when the shooter still shoots.
+#
+# Usage (from the repository root): python -m tools.check_arena [--seeds N] [--level L]
+
+import os
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+import random
+from argparse import ArgumentParser, Namespace
+
+import pygame
+
+from objects.arena.arena import Arena
+from objects.arena.events import LevelLost
+from objects.arena.hex_grid import HexGrid
+from objects.arena.hexcoord import HexCoord
+from objects.bubble import Bubble
+from objects.colors import colorList
+from maps.metal_map import MetalMap
+from physics.staticPhysics import StaticPhysics
+from simulation.row_generators import row_generator
+# the states import each other, the start menu (like in main.py) imports them in an order that works
+import states.game.start_menu_state
+from states.game.play_state import PlayState
+import utils.settings as settings
+
+STEP = 1 / 60
+# updates a shot gets to land (or the grid to reach the floor, GRID_STEP pixels down per update)
+MAX_TICKS = 600
+GRID_STEP = 4
+# updates between the two shots of the endless check
+SHOT_GAP = 3
+# distance between the centers of a flying bubble and of a grid bubble it went into (they touch at two radii)
+OVERLAP_DISTANCE = 1.5 * settings.BUBBLE_RADIUS
+
+
+def press(state: PlayState, key: int) -> None:
+    state.handle_input([pygame.event.Event(pygame.KEYDOWN, key=key), pygame.event.Event(pygame.KEYUP, key=key)])
+
+
+def shoot(state: PlayState) -> Bubble:
+    # the bubble that was shot
+    bubble = state.arena.get_shooter_bubble()
+    press(state, pygame.K_SPACE)
+    return bubble
+
+
+def landing_errors(arena: Arena, shots: list[Bubble], update) -> list[str]:
+    # plays updates until every shot stopped, each one must then be in the grid (or animating, when it popped)
+    flying = list(shots)
+    board = arena.get_grid().board
+    for _ in range(MAX_TICKS):
+        update()
+        for bubble in [bubble for bubble in flying if not bubble.shoted]:
+            flying.remove(bubble)
+            if not arena.get_grid().has(bubble) and bubble not in arena.get_dynamic_bubbles():
+                return [f"shot {shots.index(bubble) + 1} was lost when it landed"]
+
+        # a flying bubble stops when it touches the grid bubbles, it never goes into one
+        for bubble in flying:
+            x, y = bubble.position
+            for cell in board.cells_near((x, y), OVERLAP_DISTANCE):
+                center_x, center_y = board.cell_center(cell)
+                if (center_x - x) ** 2 + (center_y - y) ** 2 < OVERLAP_DISTANCE ** 2:
+                    return [f"shot {shots.index(bubble) + 1} is inside the grid while it flies"]
+
+        if not flying:
+            return []
+    return [f"{len(flying)} shots still flying after {MAX_TICKS} updates"]
+
+
+def check_same_update_shots(level: int, seed: int) -> list[str]:
+    state = PlayState(level, seed=seed)
+    shots = [shoot(state), shoot(state)]
+    return landing_errors(state.arena, shots, lambda: state.update(STEP))
+
+
+def check_shot_after_loss(level: int, seed: int) -> list[str]:
+    state = PlayState(level, seed=seed)
+    arena = state.arena
+    lost = []
+    arena.events.subscribe(LevelLost, lost.append)
+
+    # the grid goes down until it reaches the floor
+    for _ in range(MAX_TICKS):
+        arena.get_grid().move_grid_down(GRID_STEP)
+        state.update(STEP)
+        if lost:
+            break
+    else:
+        return ["the grid never reached the floor"]
+
+    bubble = shoot(state)
+    state.update(STEP)
+    return ["the shooter still shoots after the level is lost"] if arena.get_shooter_bubble() is not bubble else []
+
+
+def check_endless_refill(level: int, seed: int) -> list[str]:
+    # two bubbles in the first row right above the shooter, and every bubble of the shooter has their color:
+    # the first shot (straight up) clears the grid, the second one follows it a few updates later
+    game_map = MetalMap()
+    grid = HexGrid(*settings.ENDLESS_GRID_SIZE, *game_map.grid_size, game_map.grid_topleft)
+    shooter_position = game_map.shooter_position
+    color = random.Random(seed).choice(colorList[:settings.ENDLESS_COLOR_COUNT])
+    col = min(range(0, grid.width - 2, 2), key=lambda col: abs(grid.hex_to_pixel(HexCoord(0, col)).x - shooter_position.x))
+    for coord in (HexCoord(0, col), HexCoord(0, col + 2)):
+        grid.add_bubble(Bubble(StaticPhysics(grid.hex_to_pixel(coord)), color), coord)
+
+    arena = Arena(shooter_position.copy(), game_map, grid, random.Random(seed), row_generator(random.Random(seed)))
+    update = lambda: arena.update(dt=STEP)
+
+    shots = [arena.get_shooter_bubble()]
+    arena.shooter_shoot_handler(pygame.Vector2(0, -1))
+    for _ in range(SHOT_GAP):
+        update()
+    shots.append(arena.get_shooter_bubble())
+    arena.shooter_shoot_handler(pygame.Vector2(0, -1))
+
+    errors = landing_errors(arena, shots, update)
+    if not errors and grid.bubble_count <= 1:
+        errors.append("the grid wasn't filled again")
+    return errors
+
+
+CHECKS = {
+    "same update shots": check_same_update_shots,
+    "shot after loss": check_shot_after_loss,
+    "endless refill": check_endless_refill,
+}
+
+
+def parse_args() -> Namespace:
+    argparser = ArgumentParser()
+    argparser.add_argument("-s", "--seeds", type=int, default=20, help="Number of seeds each check is played with")
+    argparser.add_argument("-l", "--level", type=int, default=1, help="Level the checks are played from")
+    return argparser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    pygame.init()
+    # the game state also sets the video mode and loads the sprites the arena needs
+    PlayState(args.level, seed=0)
+
+    total_failures = 0
+    for name, check in CHECKS.items():
+        failures = 0
+        for seed in range(args.seeds):
+            for error in check(args.level, seed):
+                failures += 1
+                print(f"[{name} seed {seed}] {error}")
+
+        print(f"{name}: {args.seeds} seeds checked, {failures} failures")
+        total_failures += failures
+
+    pygame.quit()
+    raise SystemExit(1 if total_failures else 0)
@@ -0,0 +1,151 @@
+# Correctness check for the floating bubbles detection of the board.
+# Builds random boards and compares the flood fill engine (full and incremental modes)
+# with the original implementation, that ran a breadth-first search from every first row bubble.
+#
+# The color and row counters of the board are also checked after every removal and after shifting the rows down.
+# Every board backend is checked (or only the one given), with the same boards.
+#
+# Usage (from the repository root): python -m tools.check_floating [--boards N] [--seed S] [--backend NAME]
+
+import random
+from argparse import ArgumentParser, Namespace
+
+from objects.arena.hexcoord import HexCoord
+from objects.colors import BubbleColor
+from simulation.backends import BOARD_BACKENDS
+from simulation.board import Board
+
+
+def legacy_connected_cells(board: Board, hexcoord: HexCoord, color: BubbleColor = None) -> list[int]:
+    coords_to_check = [hexcoord]
+    connected_cells = []
+    coords_checked = []
+
+    while coords_to_check:
+        coord = coords_to_check.pop(0)
+        coords_checked.append(coord)
+
+        cell_color = board.color_at(board.cell_index(coord)) if board.in_bounds(coord) else None
+        if cell_color is None or (color is not None and cell_color != color):
+            continue
+
+        connected_cells.append(board.cell_index(coord))
+        coords_to_check.extend([
+            neighbor for neighbor in coord.neighbors()
+            if neighbor not in coords_to_check and neighbor not in coords_checked
+        ])
+
+    return connected_cells
+
+
+def legacy_floating_cells(board: Board) -> set[int]:
+    non_floating_cells = set()
+    for cell, _ in board.occupied():
+        hex = board.cell_coord(cell)
+        if hex.row != 0:
+            continue
+
+        non_floating_cells.add(cell)
+        non_floating_cells.update(legacy_connected_cells(board, hex))
+
+    return set(cell for cell, _ in board.occupied() if cell not in non_floating_cells)
+
+
+def random_board(rng: random.Random, board_class: type[Board] = Board) -> Board:
+    width, height = rng.randint(1, 24), rng.randint(1, 24)
+    density = rng.uniform(0.3, 0.95)
+    colors = rng.sample(list(BubbleColor), rng.randint(1, 4))
+
+    board = board_class(width, height, width * 16 + 20, height * 20 + 10)
+    for row in range(height):
+        for col in range(row % 2, width, 2):
+            if rng.random() < density:
+                board.add(HexCoord(row, col), rng.choice(colors))
+    return board
+
+
+def counter_errors(board: Board) -> list[str]:
+    expected_counts = {}
+    for _, color in board.occupied():
+        expected_counts[color] = expected_counts.get(color, 0) + 1
+    if board.color_counts() != expected_counts or board.present_colors() != set(expected_counts):
+        return ["color counters differ from the bubbles of the board"]
+    cells = [cell for cell, _ in board.occupied()]
+    if board.lowest_row() != (max(cells) // board.width if cells else None):
+        return ["lowest row differs from the bubbles of the board"]
+    return []
+
+
+def check_board(rng: random.Random, board: Board, pops: int) -> list[str]:
+    errors = []
+
+    # full mode, on a board that may start with floating bubbles
+    expected = legacy_floating_cells(board)
+    if set(board.floating_cells()) != expected:
+        errors.append("full flood fill differs from the original implementation")
+
+    board.drop_floating()
+
+    # incremental mode, after removing a random group of cells from an anchored board
+    for _ in range(pops):
+        occupied = list(board.occupied())
+        if not occupied:
+            break
+
+        cell, color = rng.choice(occupied)
+        removed = legacy_connected_cells(board, board.cell_coord(cell), color if rng.random() < 0.7 else None)
+        removed = removed[:rng.randint(1, len(removed))]
+        for c in removed:
+            board.remove(c)
+
+        expected = legacy_floating_cells(board)
+        found = [c for c, _ in board.drop_floating(removed)]
+        if len(found) != len(set(found)) or set(found) != expected:
+            errors.append(f"incremental flood fill differs from the original implementation after removing {len(removed)} bubbles")
+            break
+
+        # the counters follow every removal
+        counter_errors_found = counter_errors(board)
+        if counter_errors_found:
+            errors.extend(counter_errors_found)
+            break
+
+    # the rows pushed in at the top in endless mode: the bubbles move down, the ones past the last row are dropped
+    shift = 2 * board.width
+    expected = {cell + shift: color for cell, color in board.occupied() if cell + shift < board.width * board.height}
+    board.shift_down(2)
+    if dict(board.occupied()) != expected or set(board.flood_fill(expected)) != set(expected):
+        errors.append("shifted board differs from the moved bubbles")
+    errors.extend(counter_errors(board))
+
+    return errors
+
+
+def parse_args() -> Namespace:
+    argparser = ArgumentParser()
+    argparser.add_argument("-b", "--boards", type=int, default=500, help="Number of random boards to check")
+    argparser.add_argument("-p", "--pops", type=int, default=10, help="Number of removals checked on each board")
+    argparser.add_argument("-s", "--seed", type=int, default=0, help="Seed of the random boards")
+    argparser.add_argument("--backend", type=str, choices=list(BOARD_BACKENDS), default=None, help="Board backend to check (default: all)")
+    return argparser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_args()
+
+    backends = [args.backend] if args.backend is not None else list(BOARD_BACKENDS)
+
+    total_failures = 0
+    for backend in backends:
+        failures = 0
+        for board_index in range(args.boards):
+            rng = random.Random(f"{args.seed}-{board_index}")
+            board = random_board(rng, BOARD_BACKENDS[backend])
+            for error in check_board(rng, board, args.pops):
+                failures += 1
+                print(f"[{backend} board {board_index}] {board.width}x{board.height}: {error}")
+
+        print(f"{backend}: {args.boards} boards checked, {failures} failures")
+        total_failures += failures
+
+    raise SystemExit(1 if total_failures else 0)
@@ -0,0 +1,53 @@
+# Compiles the JSON levels into the binary format of levels/compiled_level.py (written next to each source,
+# with the same name). The level loader uses a compiled level instead of its JSON while the JSON doesn't change.
+#
+# Usage (from the repository root): python -m tools.compile_levels [level files...] [--clean]
+
+from argparse import ArgumentParser, Namespace
+from os import path, remove
+
+from levels.compiled_level import COMPILED_LEVEL_SUFFIX, compile_board
+from levels.level_loader import LevelLoader
+
+
+def compile_level(level_file: str) -> bool:
+    # validation happens here, once, when the JSON is read
+    board = LevelLoader.load_json_board(level_file)
+    if board is None:
+        return False
+
+    compiled_file = path.splitext(level_file)[0] + COMPILED_LEVEL_SUFFIX
+    with open(compiled_file, "wb") as f:
+        f.write(compile_board(board, level_file))
+    return True
+
+
+def parse_args() -> Namespace:
+    argparser = ArgumentParser()
+    argparser.add_argument("levels", type=str, nargs="*", help="Level files to compile (default: all the levels)")
+    argparser.add_argument("-c", "--clean", action="store_true", help="Remove the compiled levels instead")
+    return argparser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_args()
+
+    if args.levels:
+        level_files = args.levels
+    else:
+        loader = LevelLoader()
+        level_files = [path.join(loader.level_directory, level) for level in loader.levels]
+
+    failed = 0
+    for level_file in level_files:
+        if args.clean:
+            compiled_file = path.splitext(level_file)[0] + COMPILED_LEVEL_SUFFIX
+            if path.exists(compiled_file):
+                remove(compiled_file)
+        elif not compile_level(level_file):
+            print(f"{level_file}: not compiled")
+            failed += 1
+
+    if not args.clean:
+        print(f"{len(level_files) - failed} of {len(level_files)} levels compiled")
+    raise SystemExit(1 if failed else 0)
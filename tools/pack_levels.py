@@ -0,0 +1,46 @@
+# Writes levels into a single level pack file (see levels/level_pack.py), which the game can load with
+# python main.py --level-pack <pack file>. The levels are validated and compiled one at a time while the
+# pack is written, so packs of any size can be built.
+#
+# Usage (from the repository root): python -m tools.pack_levels <pack file> [level files or directories...]
+
+from argparse import ArgumentParser, Namespace
+from os import path
+
+from levels.level_loader import LevelLoader
+from levels.level_pack import LevelPackWriter
+
+
+def level_files(sources: list[str]):
+    # level files in the order they are given (the levels of a directory in the level loader order)
+    for source in sources:
+        loader = LevelLoader(level_path=source) if path.isdir(source) else None
+        if loader is None:
+            yield source
+        else:
+            yield from (path.join(loader.level_directory, level) for level in loader.levels)
+
+
+def parse_args() -> Namespace:
+    argparser = ArgumentParser()
+    argparser.add_argument("pack", type=str, help="Level pack file to write")
+    argparser.add_argument("levels", type=str, nargs="*", help="Level files or directories (default: the levels directory)")
+    return argparser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    sources = args.levels if args.levels else [LevelLoader().level_directory]
+
+    skipped = 0
+    with LevelPackWriter(args.pack) as writer:
+        for level_file in level_files(sources):
+            board = LevelLoader.load_json_board(level_file)
+            if board is None:
+                print(f"{level_file}: skipped")
+                skipped += 1
+                continue
+            writer.add(board)
+
+        print(f"{len(writer)} levels written to {args.pack}")
+    raise SystemExit(1 if skipped else 0)
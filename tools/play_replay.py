@@ -0,0 +1,84 @@
+# Plays a recorded game (main.py --record FILE) again as fast as possible, without a window or drawing,
+# and checks that it ends with the recorded score and grid. Any difference means the game stopped being
+# deterministic (or its rules changed) since the recording.
+# With --tick-rate the game is played with updates of another duration (the key events keep their time, rounded
+# to the closest update), to see how it plays at that rate. The result is only shown, not checked: a held key
+# turns the shooter for whole updates, so the aim (and then the whole game) drifts from the recorded one.
+#
+# Usage (from the repository root): python -m tools.play_replay FILE [FILE ...] [--tick-rate N]
+
+import math
+import os
+import time
+from argparse import ArgumentParser, Namespace
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+import pygame
+
+# the states import each other, the start menu (like in main.py) imports them in an order that works
+import states.game.start_menu_state
+from states.game.play_state import PlayState
+from utils.replay import Replay
+
+
+def play(replay: Replay, step: float = None) -> Replay:
+    # the replay of the game played again (with updates of the given duration), with its own score and grid hash
+    step = step if step is not None else replay.step
+    state = PlayState(replay.level, replay.level_pack, replay.seed, replay.endless)
+    event_types = {Replay.KEY_DOWN: pygame.KEYDOWN, Replay.KEY_UP: pygame.KEYUP}
+
+    # the events happen at the same time, at the update that is closest to it
+    events = {}
+    for tick, tick_events in replay.events_by_tick().items():
+        events.setdefault(round(tick * replay.step / step), []).extend(tick_events)
+    # and the game lasts at least as long as the recorded one
+    ticks = math.ceil(round(replay.ticks * replay.step / step, 6))
+
+    for tick in range(ticks + 1):
+        if tick in events:
+            state.handle_input([pygame.event.Event(event_types[event_type], key=key) for event_type, key in events[tick]])
+        # like the game loop, which leaves the state once it's over
+        if tick < ticks and state.running:
+            state.update(step)
+
+    return state.replay()
+
+
+def parse_args() -> Namespace:
+    argparser = ArgumentParser()
+    argparser.add_argument("files", nargs="+", help="Replay files")
+    argparser.add_argument("-t", "--tick-rate", type=float, default=None,
+                           help="Updates per second (default: the recorded one), only the recorded one is checked")
+    return argparser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    pygame.init()
+
+    failures = 0
+    for file in args.files:
+        replay = Replay.load(file)
+
+        start = time.perf_counter()
+        step = 1 / args.tick_rate if args.tick_rate is not None else replay.step
+        result = play(replay, step)
+        elapsed = time.perf_counter() - start
+
+        if step == replay.step:
+            ok = result.score == replay.score and result.grid_hash == replay.grid_hash
+            failures += not ok
+            status = "ok" if ok else "MISMATCH"
+        else:
+            status = f"played at {1 / step:g} updates/s, not checked"
+        print(
+            f"{file}: {status} "
+            f"(score {result.score}/{replay.score}, grid {result.grid_hash}/{replay.grid_hash}), "
+            f"{result.ticks} updates in {elapsed:.2f}s ({result.ticks / max(elapsed, 1e-9):.0f} updates/s, "
+            f"{result.ticks * result.step / max(elapsed, 1e-9):.1f}x real time)"
+        )
+
+    pygame.quit()
+    raise SystemExit(1 if failures else 0)
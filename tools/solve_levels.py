@@ -0,0 +1,180 @@
+# Finds the minimum number of shots needed to clear each level, using the headless simulation.
+# The levels are spread across worker processes, each one with its own time budget.
+#
+# The search is an iterative deepening depth-first search over (landing cell, color) shots:
+# - the shooter angles (from BUBBLE_SHOOTER_MINIMUM_ROTATION to BUBBLE_SHOOTER_MAXIMUM_ROTATION) are grouped
+#   by the cell where they land, so each distinct landing cell is tried once
+# - the color of each shot can be any color still on the board (the colors the game can pick)
+# - a shot that makes a bubble touch the floor is a dead end (the ceiling descent is not simulated)
+# When a depth is fully explored without a solution, the minimum is proven to be higher. When a depth is
+# fully explored without being cut by the depth limit, no shot sequence can clear the level.
+#
+# Usage (from the repository root): python -m tools.solve_levels [--levels 1 2 ...] [--time-budget S] [--workers N]
+
+import json
+import time
+from argparse import ArgumentParser, Namespace
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from math import cos, radians, sin
+from os import path
+
+from levels.level_loader import LevelLoader
+from objects.arena.hexcoord import HexCoord
+from objects.colors import BubbleColor
+from simulation.board import Board
+from simulation.layout import METAL_LAYOUT
+from simulation.rules import BUBBLE_SPRITE_HALF_HEIGHT
+from simulation.trajectory import TrajectorySolver
+import utils.settings as settings
+
+
+class SearchTimeout(Exception):
+    pass
+
+
+class LevelSolver:
+    def __init__(self, board: Board, angle_step: int, deadline: float) -> None:
+        self._board = board
+        self._angles = list(range(settings.BUBBLE_SHOOTER_MINIMUM_ROTATION, settings.BUBBLE_SHOOTER_MAXIMUM_ROTATION + 1, angle_step))
+        self._deadline = deadline
+        self._transpositions: dict[bytes, int] = {}
+        self._cutoff = False
+        self.nodes = 0
+
+    def solve(self, max_shots: int) -> dict:
+        result = {"shots": None, "solution": None, "lower_bound": 0, "unsolvable": False, "nodes": 0}
+
+        try:
+            for depth in range(1, max_shots + 1):
+                self._transpositions.clear()
+                self._cutoff = False
+
+                solution = self._search(self._board, depth)
+                if solution is not None:
+                    result["shots"] = len(solution)
+                    result["solution"] = solution
+                    result["lower_bound"] = len(solution)
+                    break
+
+                result["lower_bound"] = depth + 1
+                if not self._cutoff:
+                    result["unsolvable"] = True
+                    break
+        except SearchTimeout:
+            pass
+
+        result["nodes"] = self.nodes
+        return result
+
+    def _search(self, board: Board, depth: int) -> list[tuple[int, str]] | None:
+        if time.monotonic() > self._deadline:
+            raise SearchTimeout()
+
+        self.nodes += 1
+        if board.is_empty:
+            return []
+        if depth == 0:
+            self._cutoff = True
+            return None
+
+        # the same board was already explored with at least this many shots left
+        key = board.state_key()
+        if self._transpositions.get(key, -1) >= depth:
+            return None
+        self._transpositions[key] = depth
+
+        for _, angle, color, child in self._children(board):
+            solution = self._search(child, depth - 1)
+            if solution is not None:
+                return [(angle, color.name)] + solution
+
+        return None
+
+    def _children(self, board: Board) -> list[tuple[int, int, BubbleColor, Board]]:
+        children = []
+        for landing, angle in self._landings(board).items():
+            for color in sorted(board.present_colors(), key=lambda c: c.name):
+                child = board.copy()
+                child.add(landing, color)
+                result = child.pop_from(landing)
+                if child.reaches(METAL_LAYOUT.floor_y, BUBBLE_SPRITE_HALF_HEIGHT):
+                    continue
+
+                removed = len(result[0]) + len(result[1]) if result is not None else 0
+                children.append((removed, angle, color, child))
+
+        # shots that remove more bubbles first
+        children.sort(key=lambda child: -child[0])
+        return children
+
+    def _landings(self, board: Board) -> dict[HexCoord, int]:
+        # first angle that lands on each cell
+        solver = TrajectorySolver(board, METAL_LAYOUT.wall_xs, METAL_LAYOUT.ceiling_y)
+        landings = {}
+        for angle in self._angles:
+            # same direction as the bubble shooter: (0, -1) rotated by the angle (90 is straight up)
+            direction = (sin(radians(angle - 90)), -cos(radians(angle - 90)))
+            landing, _ = solver.predict_landing(METAL_LAYOUT.shooter_position, direction)
+            if landing is not None and board.is_valid_coord(landing) and landing not in landings:
+                landings[landing] = angle
+        return landings
+
+
+def solve_level(level_file: str, time_budget: float, max_shots: int, angle_step: int) -> dict:
+    start = time.monotonic()
+    board = LevelLoader.load_board(level_file, *METAL_LAYOUT.grid_size, METAL_LAYOUT.grid_topleft)
+    if board is None:
+        return {"level": path.basename(level_file), "error": "invalid level"}
+
+    solver = LevelSolver(board, angle_step, start + time_budget)
+    result = solver.solve(max_shots)
+    result["level"] = path.basename(level_file)
+    result["bubbles"] = len(board)
+    result["seconds"] = round(time.monotonic() - start, 3)
+    return result
+
+
+def describe(result: dict) -> str:
+    if "error" in result:
+        return f"{result['level']}: {result['error']}"
+    if result["unsolvable"]:
+        return f"{result['level']}: cannot be cleared (proven, {result['nodes']} nodes)"
+    if result["shots"] is not None:
+        return f"{result['level']}: {result['shots']} shots ({result['nodes']} nodes, {result['seconds']}s)"
+    return f"{result['level']}: not solved in time, needs at least {result['lower_bound']} shots ({result['nodes']} nodes)"
+
+
+def parse_args() -> Namespace:
+    argparser = ArgumentParser()
+    argparser.add_argument("-l", "--levels", type=int, nargs="*", help="Level numbers to solve (default: all)")
+    argparser.add_argument("-t", "--time-budget", type=float, default=30, help="Seconds of search for each level")
+    argparser.add_argument("-w", "--workers", type=int, default=None, help="Number of worker processes")
+    argparser.add_argument("-m", "--max-shots", type=int, default=60, help="Maximum number of shots searched")
+    argparser.add_argument("-a", "--angle-step", type=int, default=1,
+                           help="Degrees between two tried angles")
+    argparser.add_argument("-o", "--output", type=str, default=None, help="JSON file to write the results to")
+    return argparser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_args()
+
+    loader = LevelLoader(*METAL_LAYOUT.grid_size, METAL_LAYOUT.grid_topleft)
+    levels = loader.levels if not args.levels else [loader.levels[number - 1] for number in args.levels]
+    level_files = [path.join(loader.level_directory, level) for level in levels]
+
+    results = []
+    with ProcessPoolExecutor(max_workers=args.workers) as executor:
+        futures = [
+            executor.submit(solve_level, level_file, args.time_budget, args.max_shots, args.angle_step)
+            for level_file in level_files
+        ]
+        for future in as_completed(futures):
+            result = future.result()
+            results.append(result)
+            print(describe(result))
+
+    if args.output is not None:
+        results.sort(key=lambda result: levels.index(result["level"]))
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=4)
@@ -0,0 +1,121 @@
+import pygame
+import hashlib
+import struct
+from os import makedirs, path, replace
+from utils.spritesheet import SpriteSheet
+import utils.settings as settings
+
+class AssetManager:
+    # Loads every image once per process, already scaled and converted to the display pixel format
+    # (so a video mode must be set before the first load). The surfaces are shared, they must not be modified.
+    #
+    # The scaled pixels are also stored on disk (when there is a cache directory), keyed by the hash of the
+    # source file, the scale and how the image was cut, so the next runs skip the decoding and the scaling.
+    CACHE_HEADER = struct.Struct("<IIB?BBB")
+
+    def __init__(self, cache_directory: str | None = None) -> None:
+        self.cache_directory = cache_directory
+        self._images: dict[tuple, pygame.Surface] = {}
+        self._sheets: dict[tuple, list[pygame.Surface]] = {}
+
+    def image(self, filename: str, scale: float = 1, alpha: bool = True) -> pygame.Surface:
+        # alpha keeps the transparency of the image (convert_alpha), otherwise it is made opaque (convert)
+        key = (filename, scale, alpha)
+        image = self._images.get(key, None)
+        if image is not None:
+            return image
+
+        cache_file = self._cache_file(filename, f"image_{scale}_{alpha}")
+        image = self._read_cache(cache_file)
+        if image is None:
+            image = pygame.image.load(filename)
+            if scale != 1:
+                image = pygame.transform.scale_by(image, scale)
+            image = image.convert_alpha() if alpha else image.convert()
+            self._write_cache(cache_file, image)
+
+        self._images[key] = image
+        return image
+
+    def sprite_sheet(self, filename: str, rects: list[tuple[int, int, int, int]], colorkey=None, scale: float = 1) -> list[pygame.Surface]:
+        # images cut from a sprite sheet (see SpriteSheet.images_at), each one scaled
+        key = (filename, tuple(tuple(rect) for rect in rects), colorkey, scale)
+        images = self._sheets.get(key, None)
+        if images is not None:
+            return images
+
+        variant = hashlib.sha1(repr(key[1:]).encode()).hexdigest()
+        cache_files = [self._cache_file(filename, f"sheet_{variant}_{i}") for i in range(len(rects))]
+        images = [self._read_cache(cache_file) for cache_file in cache_files]
+        if any(image is None for image in images):
+            images = SpriteSheet(filename).images_at(rects, colorkey)
+            if scale != 1:
+                images = [pygame.transform.scale_by(image, scale) for image in images]
+            for cache_file, image in zip(cache_files, images):
+                self._write_cache(cache_file, image)
+
+        self._sheets[key] = images
+        return images
+
+    def clear(self) -> None:
+        # only the loaded surfaces, the disk cache is kept
+        self._images.clear()
+        self._sheets.clear()
+
+
+    def _cache_file(self, filename: str, variant: str) -> str | None:
+        if self.cache_directory is None:
+            return None
+
+        try:
+            with open(filename, "rb") as f:
+                source_hash = hashlib.sha1(f.read()).hexdigest()
+        except OSError:
+            return None
+
+        return path.join(self.cache_directory, f"{source_hash}_{variant}.raw")
+
+    def _read_cache(self, cache_file: str | None) -> pygame.Surface | None:
+        if cache_file is None or not path.isfile(cache_file):
+            return None
+
+        try:
+            with open(cache_file, "rb") as f:
+                data = f.read()
+            width, height, alpha, has_colorkey, *colorkey = self.CACHE_HEADER.unpack_from(data)
+            pixels = data[self.CACHE_HEADER.size:]
+
+            image = pygame.image.frombytes(pixels, (width, height), "RGBA" if alpha else "RGB")
+            image = image.convert_alpha() if alpha else image.convert()
+            if has_colorkey:
+                image.set_colorkey(colorkey, pygame.RLEACCEL)
+            return image
+        except (OSError, ValueError, struct.error, pygame.error):
+            # unreadable or from an older format, loaded again from the source
+            return None
+
+    def _write_cache(self, cache_file: str | None, image: pygame.Surface) -> None:
+        if cache_file is None:
+            return
+
+        alpha = bool(image.get_flags() & pygame.SRCALPHA)
+        colorkey = image.get_colorkey()
+        header = self.CACHE_HEADER.pack(
+            image.get_width(), image.get_height(), alpha,
+            colorkey is not None, *(colorkey[:3] if colorkey is not None else (0, 0, 0))
+        )
+
+        try:
+            makedirs(self.cache_directory, exist_ok=True)
+            # written next to the final file and then renamed, so a reader never sees half a file
+            with open(cache_file + ".tmp", "wb") as f:
+                f.write(header)
+                f.write(pygame.image.tobytes(image, "RGBA" if alpha else "RGB"))
+            replace(cache_file + ".tmp", cache_file)
+        except OSError:
+            # the cache is optional (e.g. read-only directory)
+            pass
+
+
+# shared by all the states
+assets = AssetManager(settings.ASSET_CACHE_DIRECTORY)
@@ -0,0 +1,85 @@
+import pygame
+from typing import Iterable
+
+class DirtyRenderer:
+    # draws layers of sprites over a static background, but only redraws and presents the regions that changed
+    # since the previous frame (a sprite changes when its image, its rect or its layer is not the same anymore)
+
+    # above this fraction of the screen, a full redraw is cheaper than many small ones
+    FULL_REDRAW_AREA = 0.5
+
+    def __init__(self, display: pygame.Surface, background: pygame.Surface) -> None:
+        self._display = display
+        self._background = background
+        self._screen_rect = display.get_rect()
+        self._last_frame: dict[pygame.sprite.Sprite, tuple[pygame.Surface, pygame.Rect, int]] = {}
+        self._full_redraw = True
+
+    def invalidate(self) -> None:
+        self._full_redraw = True
+
+    def render(self, layers: Iterable[Iterable[pygame.sprite.Sprite]], offsets: dict[int, tuple[int, int]] = None) -> None:
+        # layers (and the sprites of each layer) are drawn in the given order, the sprites of the layers
+        # with an offset (layer index -> offset in pixels) are drawn that far from their rect
+        offsets = offsets if offsets is not None else {}
+        frame = {
+            sprite: (sprite.image, sprite.rect.move(offsets.get(layer, (0, 0))), layer)
+            for layer, sprites in enumerate(layers)
+            for sprite in sprites
+        }
+        dirty = self._dirty_rects(frame)
+        self._last_frame = frame
+
+        if self._full_redraw or sum(rect.w * rect.h for rect in dirty) > self.FULL_REDRAW_AREA * self._screen_rect.w * self._screen_rect.h:
+            self._full_redraw = False
+            self._display.blit(self._background, (0, 0))
+            for image, rect, _ in frame.values():
+                self._display.blit(image, rect)
+            pygame.display.flip()
+            return
+
+        if not dirty:
+            return
+
+        images = list(frame.values())
+        rects = [rect for _, rect, _ in images]
+        for dirty_rect in dirty:
+            # restore the background and redraw every sprite touching the region, clipped to it
+            self._display.set_clip(dirty_rect)
+            self._display.blit(self._background, dirty_rect, dirty_rect)
+            for index in dirty_rect.collidelistall(rects):
+                image, rect, _ = images[index]
+                self._display.blit(image, rect)
+        self._display.set_clip(None)
+
+        pygame.display.update(dirty)
+
+    def _dirty_rects(self, frame: dict[pygame.sprite.Sprite, tuple[pygame.Surface, pygame.Rect, int]]) -> list[pygame.Rect]:
+        dirty = []
+        for sprite, (image, rect, layer) in frame.items():
+            last = self._last_frame.get(sprite, None)
+            if last is None:
+                dirty.append(rect)
+            elif last[0] is not image or last[1] != rect or last[2] != layer:
+                dirty.append(last[1].union(rect))
+
+        for sprite, (_, rect, _) in self._last_frame.items():
+            if sprite not in frame:
+                dirty.append(rect)
+
+        return self._merge(rect.clip(self._screen_rect) for rect in dirty)
+
+    @staticmethod
+    def _merge(rects: Iterable[pygame.Rect]) -> list[pygame.Rect]:
+        # joins overlapping rects, so no region is redrawn twice
+        merged: list[pygame.Rect] = []
+        for rect in rects:
+            if rect.w == 0 or rect.h == 0:
+                continue
+
+            index = rect.collidelist(merged)
+            while index != -1:
+                rect = rect.union(merged.pop(index))
+                index = rect.collidelist(merged)
+            merged.append(rect)
+        return merged
@@ -0,0 +1,39 @@
+from typing import Any, Callable
+
+import utils.profiler as profiler
+
+class EventBus:
+    # handlers subscribe to a type of event and get every published event of that type, in the order
+    # they subscribed. The lists of handlers are replaced instead of changed, so a handler may subscribe or
+    # unsubscribe while an event is published (the event still goes to the handlers it was published to).
+    # With the profiler enabled, the time of each handler is a phase of the frame ("event.<type>.<handler>")
+    def __init__(self) -> None:
+        # event type -> (handler, profiler phase name)
+        self._subscribers: dict[type, list[tuple[Callable[[Any], None], str]]] = {}
+
+    def subscribe(self, event_type: type, handler: Callable[[Any], None]) -> None:
+        phase = f"event.{event_type.__name__}.{getattr(handler, '__qualname__', type(handler).__name__)}"
+        self._subscribers[event_type] = self._subscribers.get(event_type, []) + [(handler, phase)]
+
+    def unsubscribe(self, event_type: type, handler: Callable[[Any], None]) -> None:
+        subscribers = self._subscribers.get(event_type, [])
+        for index, (subscriber, _) in enumerate(subscribers):
+            if subscriber == handler:
+                self._subscribers[event_type] = subscribers[:index] + subscribers[index + 1:]
+                return
+
+    def publish(self, event: Any) -> None:
+        subscribers = self._subscribers.get(type(event), None)
+        if not subscribers:
+            return
+
+        frame_profiler = profiler.active
+        if frame_profiler is None:
+            for handler, _ in subscribers:
+                handler(event)
+            return
+
+        for handler, phase in subscribers:
+            start = frame_profiler.now()
+            handler(event)
+            frame_profiler.lap(phase, start)
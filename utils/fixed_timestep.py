@@ -0,0 +1,23 @@
+class FixedTimestep:
+    # turns the variable time between frames into a number of fixed simulation ticks.
+    # The time that is left (less than a tick) is kept for the next frame and gives how far the
+    # frame is between the last two ticks (alpha), so the drawing can interpolate between them
+    def __init__(self, tick_rate: float, max_frame_time: float) -> None:
+        if tick_rate <= 0:
+            raise ValueError("Tick rate must be positive")
+
+        self.step = 1 / tick_rate
+        # longer frames (e.g. the window was dragged) are cut, instead of running many ticks to catch up
+        self.max_frame_time = max_frame_time
+        self._accumulator = 0.0
+
+    @property
+    def alpha(self) -> float:
+        return self._accumulator / self.step
+
+    def advance(self, frame_time: float) -> int:
+        # number of ticks to run for a frame that took frame_time seconds
+        self._accumulator += min(frame_time, self.max_frame_time)
+        ticks = int(self._accumulator / self.step)
+        self._accumulator -= ticks * self.step
+        return ticks
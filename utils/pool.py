@@ -0,0 +1,63 @@
+import utils.settings as settings
+
+class Pool:
+    # free instances of a class, given back with release and reused by acquire: a reused instance is set up
+    # again by its reset method, which takes the same arguments as the constructor.
+    # At most max_size free instances are kept, the others are left to the garbage collector
+    def __init__(self, cls: type, max_size: int) -> None:
+        if max_size < 0:
+            raise ValueError("Max size can't be negative")
+
+        self.cls = cls
+        self.max_size = max_size
+        self._free: list = []
+        self.created = 0
+        self.reused = 0
+
+    def acquire(self, *args, **kwargs):
+        if self._free:
+            instance = self._free.pop()
+            instance.reset(*args, **kwargs)
+            self.reused += 1
+            return instance
+
+        self.created += 1
+        return self.cls(*args, **kwargs)
+
+    def release(self, instance) -> None:
+        # the instance must not be used anymore by whoever releases it
+        if len(self._free) < self.max_size:
+            self._free.append(instance)
+
+    def clear(self) -> None:
+        self._free.clear()
+
+    def __len__(self) -> int:
+        return len(self._free)
+
+
+class ObjectPools:
+    # one pool per class, so an instance is released without knowing where it came from.
+    # Not thread safe: only the game loop uses it (the level prefetch thread creates its own bubbles)
+    def __init__(self, max_size: int) -> None:
+        self.max_size = max_size
+        self._pools: dict[type, Pool] = {}
+
+    def pool(self, cls: type) -> Pool:
+        pool = self._pools.get(cls, None)
+        if pool is None:
+            pool = self._pools[cls] = Pool(cls, self.max_size)
+        return pool
+
+    def acquire(self, cls: type, *args, **kwargs):
+        return self.pool(cls).acquire(*args, **kwargs)
+
+    def release(self, instance) -> None:
+        self.pool(type(instance)).release(instance)
+
+    def clear(self) -> None:
+        for pool in self._pools.values():
+            pool.clear()
+
+
+object_pools = ObjectPools(settings.OBJECT_POOL_SIZE)
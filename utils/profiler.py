@@ -0,0 +1,138 @@
+import json
+from collections import deque
+from time import perf_counter
+
+import pygame
+
+# the enabled profiler (python main.py --profile), None when profiling is disabled.
+# The timed code only checks this once per call, so a disabled profiler costs nothing
+active: "FrameProfiler | None" = None
+# its overlay (python main.py --profile-overlay), drawn by the states as the last layer of their frame
+overlay: "ProfilerOverlay | None" = None
+
+def enable(window: int, export_file: str = None) -> "FrameProfiler":
+    global active
+    active = FrameProfiler(window, export_file)
+    return active
+
+def enable_overlay(font: pygame.font.Font, color, background, refresh: int) -> "ProfilerOverlay":
+    global overlay
+    overlay = ProfilerOverlay(active, font, color, background, refresh)
+    return overlay
+
+def disable() -> None:
+    global active, overlay
+    if active is not None:
+        active.close()
+    active = None
+    overlay = None
+
+
+class FrameProfiler:
+    # time spent in each phase of the frame (handle_input, update, draw and the phases of the arena update),
+    # kept for the last `window` frames to give rolling percentiles.
+    # A phase that runs many times in a frame (e.g. the update, once per tick) counts its total time
+    def __init__(self, window: int, export_file: str = None) -> None:
+        if window < 1:
+            raise ValueError("Window must be at least 1 frame")
+
+        self.window = window
+        self.frames = 0
+        self._samples: dict[str, deque[float]] = {}
+        self._frame: dict[str, float] = {}
+
+        # .jsonl: one object per frame ({"frame": n, "<phase>": ms, ...}), anything else: CSV rows frame,phase,ms
+        self._export = open(export_file, "w") if export_file is not None else None
+        self._export_jsonl = export_file is not None and export_file.endswith(".jsonl")
+        if self._export is not None and not self._export_jsonl:
+            self._export.write("frame,phase,ms\n")
+
+    @staticmethod
+    def now() -> float:
+        return perf_counter()
+
+    def lap(self, phase: str, start: float) -> float:
+        # adds the time since start to the phase and returns the current time (the start of the next phase)
+        now = perf_counter()
+        self._frame[phase] = self._frame.get(phase, 0.0) + now - start
+        return now
+
+    def end_frame(self) -> None:
+        for phase, seconds in self._frame.items():
+            samples = self._samples.get(phase, None)
+            if samples is None:
+                samples = self._samples[phase] = deque(maxlen=self.window)
+            samples.append(seconds)
+
+        if self._export is not None:
+            self._write_frame()
+
+        self.frames += 1
+        self._frame.clear()
+
+    def _write_frame(self) -> None:
+        if self._export_jsonl:
+            row = {"frame": self.frames}
+            row.update((phase, round(seconds * 1000, 4)) for phase, seconds in self._frame.items())
+            self._export.write(json.dumps(row, separators=(",", ":")) + "\n")
+        else:
+            for phase, seconds in self._frame.items():
+                self._export.write(f"{self.frames},{phase},{seconds * 1000:.4f}\n")
+
+    def percentile(self, phase: str, percent: float) -> float:
+        # nearest-rank percentile of the phase over the window, in seconds
+        samples = sorted(self._samples.get(phase, ()))
+        if not samples:
+            return 0.0
+        rank = max(0, min(len(samples) - 1, int(round(percent / 100 * len(samples))) - 1))
+        return samples[rank]
+
+    def report(self, percents: tuple[float, ...] = (50, 95, 99)) -> list[tuple[str, list[float], float]]:
+        # (phase, percentiles, maximum) of every phase, in seconds
+        return [
+            (phase, [self.percentile(phase, percent) for percent in percents], max(samples))
+            for phase, samples in self._samples.items()
+        ]
+
+    def report_lines(self, percents: tuple[float, ...] = (50, 95, 99)) -> list[str]:
+        width = max([len("phase")] + [len(phase) for phase in self._samples]) + 1
+        header = f"{'phase':<{width}}" + "".join(f"{f'p{percent:g}':>9}" for percent in percents) + f"{'max':>9}"
+        lines = [header]
+        for phase, values, maximum in self.report(percents):
+            lines.append(f"{phase:<{width}}" + "".join(f"{value * 1000:>9.3f}" for value in values) + f"{maximum * 1000:>9.3f}")
+        return lines
+
+    def close(self) -> None:
+        if self._export is not None:
+            self._export.close()
+            self._export = None
+
+
+class ProfilerOverlay(pygame.sprite.Sprite):
+    # the percentiles (ms) of the profiler, as a sprite over the top left corner of the screen. The states draw it
+    # with the rest of their frame, so it's presented with it (and only redrawn by DirtyRenderer when it changes).
+    # The text is only rendered again every `refresh` frames, reading it doesn't need more
+    def __init__(self, profiler: FrameProfiler, font: pygame.font.Font, color, background, refresh: int) -> None:
+        super().__init__()
+        self._profiler = profiler
+        self._font = font
+        self._color = color
+        self._background = background
+        self._refresh = refresh
+        self.image = self._render()
+        self.rect = self.image.get_rect()
+
+    def update(self) -> None:
+        if self._profiler.frames % self._refresh == 0:
+            self.image = self._render()
+            self.rect = self.image.get_rect()
+
+    def _render(self) -> pygame.Surface:
+        lines = [self._font.render(line, False, self._color, self._background) for line in self._profiler.report_lines()]
+        image = pygame.Surface((max(line.get_width() for line in lines), sum(line.get_height() for line in lines)))
+        image.fill(self._background)
+        y = 0
+        for line in lines:
+            image.blit(line, (0, y))
+            y += line.get_height()
+        return image
@@ -0,0 +1,76 @@
+import hashlib
+import json
+import struct
+
+class Replay:
+    # everything needed to play a game again exactly: the seed of its random generator, the first level,
+    # the duration of each update and the key events with the update they happened before (and the endless mode).
+    # The score and the grid hash at the end are kept to check that the game played again ends the same way
+    FORMAT_VERSION = 2
+    # versions that can still be loaded (version 1 has no endless mode)
+    SUPPORTED_VERSIONS = (1, 2)
+    KEY_UP = 0
+    KEY_DOWN = 1
+
+    def __init__(
+        self,
+        seed: int, level: int, level_pack: str | None, step: float,
+        ticks: int = 0, events: list[tuple[int, int, int]] = None,
+        score: int = None, grid_hash: str = None,
+        endless: bool = False
+    ) -> None:
+        self.seed = seed
+        self.level = level
+        self.level_pack = level_pack
+        self.step = step
+        self.ticks = ticks
+        # (update index, KEY_DOWN or KEY_UP, key)
+        self.events = events if events is not None else []
+        self.score = score
+        self.grid_hash = grid_hash
+        self.endless = endless
+
+    def events_by_tick(self) -> dict[int, list[tuple[int, int]]]:
+        events = {}
+        for tick, event_type, key in self.events:
+            events.setdefault(tick, []).append((event_type, key))
+        return events
+
+    def save(self, file: str) -> None:
+        data = {
+            "version": Replay.FORMAT_VERSION,
+            "seed": self.seed, "level": self.level, "level_pack": self.level_pack, "step": self.step,
+            "ticks": self.ticks, "score": self.score, "grid_hash": self.grid_hash, "endless": self.endless,
+            # flat list (update, type, key, update, type, key, ...)
+            "events": [value for event in self.events for value in event],
+        }
+        with open(file, "w") as f:
+            json.dump(data, f, separators=(",", ":"))
+
+    @staticmethod
+    def load(file: str) -> "Replay":
+        try:
+            with open(file, "r") as f:
+                data = json.load(f)
+        except (OSError, json.JSONDecodeError) as e:
+            raise RuntimeError(f"Error reading replay: {e}")
+
+        version = data.get("version")
+        if version not in Replay.SUPPORTED_VERSIONS:
+            raise RuntimeError(f"Unsupported replay version: {version}")
+
+        flat_events = data["events"]
+        events = [tuple(flat_events[i:i + 3]) for i in range(0, len(flat_events), 3)]
+        return Replay(
+            data["seed"], data["level"], data["level_pack"], data["step"],
+            data["ticks"], events, data["score"], data["grid_hash"],
+            data["endless"] if version >= 2 else False
+        )
+
+
+def grid_hash(board) -> str | None:
+    # cells and position of the board (None when there is no board, e.g. after the last level).
+    # The position is rounded, it is a sum of many small moves that depends on the duration of the updates
+    if board is None:
+        return None
+    return hashlib.sha1(board.state_key() + struct.pack("<dd", *(round(value, 6) for value in board.top_left))).hexdigest()
@@ -1,20 +1,59 @@
 GAME_SCALE = 2
+# the game is updated this many times per second, whatever the frame rate
+SIMULATION_TICK_RATE = 60
+# at most this much time (in seconds) is simulated for a single frame
+MAX_FRAME_TIME = 0.25
+FRAME_RATE = 60
 GAME_CAPTION = "Puzzle Bobble"
+# scaled and converted images are stored here between runs (None disables the disk cache)
+ASSET_CACHE_DIRECTORY = ".cache/assets"
 BG_COLOR = (255, 255, 255)
+# rows of each chunk of the grid bubbles, only the chunks in view are drawn and updated
+GRID_CHUNK_ROWS = 16
+# free bubbles and physics bodies kept for reuse, per class (utils/pool.py)
+OBJECT_POOL_SIZE = 256
+
+# frame profiler (python main.py --profile): percentiles over this many frames
+PROFILER_WINDOW = 300
+PROFILER_OVERLAY_FONT_NAME = "monospace"
+PROFILER_OVERLAY_FONT_SIZE = 18
+PROFILER_OVERLAY_COLOR = (255, 255, 0)
+PROFILER_OVERLAY_BG_COLOR = (0, 0, 0)
+# frames between two renders of the overlay text
+PROFILER_OVERLAY_REFRESH = 30
+
+# endless mode (python main.py --endless): every descent pushes ENDLESS_PUSH_ROWS new rows in at the top of the grid
+# (an even number, to keep the hex layout), made by the row generator (simulation/row_generators.py)
+ENDLESS_ROW_GENERATOR = "random"
+ENDLESS_GRID_SIZE = (15, 15)
+ENDLESS_START_ROWS = 6
+ENDLESS_PUSH_ROWS = 2
+ENDLESS_COLOR_COUNT = 5
+
+# storage of the grid state: "array" (array of cells) or "bitboard" (one bitmask per color), see simulation/backends.py
+BOARD_BACKEND = "array"
 
 # used to calculate collisions. this doesn't affect the sprite
 BUBBLE_RADIUS = 7 * GAME_SCALE
+# size of each bubble sprite in the sprite sheet (before scaling)
+BUBBLE_SPRITE_SIZE = 32
 
 BUBBLE_FLOATING_DURATION_MINIMUM = 2
 BUBBLE_FLOATING_DURATION_MAXIMUM = 4
-BUBBLE_FLOATING_ACCELERATION_X = 2
-BUBBLE_FLOATING_ACCELERATION_Y = 5
+# pixels per second squared
+BUBBLE_FLOATING_ACCELERATION_X = 120
+BUBBLE_FLOATING_ACCELERATION_Y = 300
+# a bubble bouncing on the floor slower than this (pixels per second) stops
+BUBBLE_FLOOR_STOP_SPEED = 12
 
 # the minimum and maximum values for a random x direction when starting floating
 # value is divided by 10
 BUBBLE_FLOATING_DIRECTION_X_MINIMUM = 1
 BUBBLE_FLOATING_DIRECTION_X_MAXIMUM = 3
-BUBBLE_TOTAL_POP_ANIMATION_FRAMES = 30
+# seconds
+BUBBLE_POP_ANIMATION_DURATION = 0.5
+# speed of a shot bubble (multiplied by the game scale)
+BUBBLE_SHOT_SPEED = 200
 
 SCORE_SCREEN_POSITION = (0,0)
 SCORE_TEXT_COLOR = (255,255,255)
@@ -22,7 +61,8 @@ SCORE_TEXT_FONT_SIZE = 20
 SCORE_TEXT_FONT_NAME = "monospace"
 SCORE_TEXT_BG_COLOR = (255,0,0)
 
-BUBBLE_SHOOTER_ROTATION_DEGREES = 1
+# degrees per second while a key is held
+BUBBLE_SHOOTER_ROTATION_SPEED = 60
 BUBBLE_SHOOTER_MINIMUM_ROTATION = 15
 BUBBLE_SHOOTER_MAXIMUM_ROTATION = 180 - BUBBLE_SHOOTER_MINIMUM_ROTATION
 
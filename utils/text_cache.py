@@ -0,0 +1,47 @@
+import pygame
+from collections import OrderedDict
+
+class TextCache:
+    # rendered text surfaces, keyed by (font, text, antialias, color, background), with LRU eviction.
+    # Fonts are also created here, so every state that asks for the same font shares the same object
+    # (and the same cached surfaces)
+    def __init__(self, max_size: int) -> None:
+        if max_size < 1:
+            raise ValueError("Max size must be at least 1")
+
+        self.max_size = max_size
+        self._surfaces: OrderedDict[tuple, pygame.Surface] = OrderedDict()
+        self._fonts: dict[tuple[str | None, int], pygame.font.Font] = {}
+
+    def font(self, name: str | None, size: int) -> pygame.font.Font:
+        # None is the pygame default font
+        key = (name, size)
+        font = self._fonts.get(key, None)
+        if font is None:
+            font = pygame.font.SysFont(name, size) if name is not None else pygame.font.Font(None, size)
+            self._fonts[key] = font
+        return font
+
+    def render(self, font: pygame.font.Font, text: str, antialias: bool, color, background=None) -> pygame.Surface:
+        # the returned surface is shared, it must not be modified
+        key = (font, text, antialias, tuple(color), tuple(background) if background is not None else None)
+        surface = self._surfaces.get(key, None)
+        if surface is not None:
+            self._surfaces.move_to_end(key)
+            return surface
+
+        surface = font.render(text, antialias, color, background)
+        self._surfaces[key] = surface
+        if len(self._surfaces) > self.max_size:
+            self._surfaces.popitem(last=False)
+        return surface
+
+    def clear(self) -> None:
+        self._surfaces.clear()
+
+    def __len__(self) -> int:
+        return len(self._surfaces)
+
+
+# shared by all the states
+text_cache = TextCache(64)